@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from bookings.models import Booking, BookingItem
+from services.pricing import resolve_prices
 
 
 class BookingItemInline(admin.TabularInline):
@@ -37,13 +38,14 @@ class BookingAdmin(admin.ModelAdmin):
         instances = formset.save(commit=False)
         for obj in formset.deleted_objects:
             obj.delete()
+        prices = resolve_prices(instance.service for instance in instances if instance.service_id)
         for instance in instances:
             if instance.service_id:
                 instance.service_name = instance.service.name
                 instance.category = instance.service.category
                 instance.subcategory = instance.service.subcategory
                 instance.duration_minutes = instance.service.duration_minutes
-                instance.price = instance.service.current_price
+                instance.price = prices[instance.service_id]
             instance.save()
         formset.save_m2m()
         booking = form.instance
@@ -0,0 +1,230 @@
+from array import array
+from collections import deque
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db.models import DurationField, F, Max, Q
+from django.utils import timezone
+
+from bookings.models import Booking, SlotOccupancy
+from core.metrics import record_cache_lookups
+from core.versioning import bump_version, get_version
+
+OCCUPANCY_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+AVAILABILITY_VERSION_KEY = "availability:version"
+BOOKINGS_VERSION_KEY = "bookings:version"
+LONGEST_BOOKING_KEY = "availability:longest-booking"
+
+
+def slots_needed(duration_minutes, slot_minutes):
+    return -(-duration_minutes // slot_minutes)
+
+
+def round_up_to_next_slot(dt_value, slot_minutes):
+    dt_value = dt_value.replace(second=0, microsecond=0)
+    remainder = dt_value.minute % slot_minutes
+    if remainder or dt_value.second or dt_value.microsecond:
+        dt_value += timedelta(minutes=slot_minutes - remainder if remainder else slot_minutes)
+    return dt_value.replace(second=0, microsecond=0)
+
+
+def get_day_bounds(target_date, working_hour, slot_minutes, tz, now):
+    day_start = timezone.make_aware(datetime.combine(target_date, working_hour.open_time), tz)
+    day_end = timezone.make_aware(datetime.combine(target_date, working_hour.close_time), tz)
+    first_start = day_start
+    if target_date == now.date():
+        first_start = max(first_start, round_up_to_next_slot(now, slot_minutes))
+    return first_start, day_end
+
+
+def count_start_candidates(first_start, day_end, slot_minutes, duration_minutes=0):
+    slot = timedelta(minutes=slot_minutes)
+    latest_end = day_end - max(slot, timedelta(minutes=duration_minutes))
+    if latest_end < first_start:
+        return 0
+    return (latest_end - first_start) // slot + 1
+
+
+@lru_cache(maxsize=4096)
+def get_day_grid(target_date, slot_minutes, tz):
+    grid_start = timezone.make_aware(datetime.combine(target_date, time.min), tz).astimezone(dt_timezone.utc)
+    grid_end = timezone.make_aware(datetime.combine(target_date + timedelta(days=1), time.min), tz).astimezone(dt_timezone.utc)
+    return grid_start, slots_needed((grid_end - grid_start) // timedelta(minutes=1), slot_minutes)
+
+
+def get_grid_offset(grid_start, starts_at, slot_minutes):
+    offset, remainder = divmod(starts_at.astimezone(dt_timezone.utc) - grid_start, timedelta(minutes=slot_minutes))
+    return None if remainder or offset < 0 else offset
+
+
+def get_longest_booking():
+    # Cached under one key together with the bookings version it was computed
+    # for, so a booking change replaces the entry instead of orphaning it.
+    # None when there is no active booking.
+    version = get_bookings_version()
+    cached = cache.get(LONGEST_BOOKING_KEY)
+    if cached and cached[0] == version:
+        return cached[1] or None
+    longest = Booking.objects.exclude(status=Booking.Status.CANCELLED).aggregate(
+        longest=Max(F("ends_at") - F("starts_at"), output_field=DurationField())
+    )["longest"] or timedelta(0)
+    cache.set(LONGEST_BOOKING_KEY, (version, longest), None)
+    return longest or None
+
+
+def get_overlapping_bookings(range_start, range_end, longest):
+    # The lower starts_at bound lets the partial index be range-scanned from
+    # both sides instead of walking the whole history before range_end.
+    return Booking.objects.filter(
+        ~Q(status=Booking.Status.CANCELLED),
+        starts_at__gt=range_start - longest,
+        starts_at__lt=range_end,
+        ends_at__gt=range_start,
+    )
+
+
+def load_booking_intervals(range_start, range_end):
+    longest = get_longest_booking()
+    if longest is None:
+        return []
+    return list(get_overlapping_bookings(range_start, range_end, longest).values_list("starts_at", "ends_at"))
+
+
+def build_occupancy(grid_start, slot_minutes, slot_count, intervals):
+    # Sweep over start/end events: each booking adds +1 to the first slot it
+    # touches and -1 after the last one, a prefix sum yields per-slot counts.
+    slot = timedelta(minutes=slot_minutes)
+    origin = grid_start.astimezone(dt_timezone.utc)
+    events = [0] * (slot_count + 1)
+    for starts_at, ends_at in intervals:
+        first = max((starts_at - origin) // slot, 0)
+        last = min(-((origin - ends_at) // slot), slot_count)
+        if first < last:
+            events[first] += 1
+            events[last] -= 1
+    occupancy = []
+    running = 0
+    for event in events[:slot_count]:
+        running += event
+        occupancy.append(running)
+    return occupancy
+
+
+def sliding_window_max(values, window):
+    maxima = []
+    candidates = deque()
+    for index, value in enumerate(values):
+        while candidates and values[candidates[-1]] <= value:
+            candidates.pop()
+        candidates.append(index)
+        if candidates[0] <= index - window:
+            candidates.popleft()
+        if index >= window - 1:
+            maxima.append(values[candidates[0]])
+    return maxima
+
+
+def find_free_windows(occupancy, window, capacity):
+    return [index for index, peak in enumerate(sliding_window_max(occupancy, window)) if peak < capacity]
+
+
+def get_day_versions(dates):
+    keys = {day: f"availability:day-version:{day.isoformat()}" for day in dates}
+    found = cache.get_many([AVAILABILITY_VERSION_KEY, *keys.values()])
+    global_version = found.get(AVAILABILITY_VERSION_KEY) or get_version(AVAILABILITY_VERSION_KEY)
+    return {day: f"{global_version}:{found.get(key) or get_version(key)}" for day, key in keys.items()}
+
+
+def invalidate_day_occupancy(dates):
+    if dates:
+        cache.set_many({f"availability:day-version:{day.isoformat()}": uuid4().hex for day in dates}, None)
+
+
+def bump_availability_version():
+    bump_version(AVAILABILITY_VERSION_KEY)
+
+
+def get_bookings_version():
+    return get_version(BOOKINGS_VERSION_KEY)
+
+
+def bump_bookings_version():
+    bump_version(BOOKINGS_VERSION_KEY)
+
+
+def get_occupancy_for_dates(dates, slot_minutes, tz):
+    # Versions are read before the counters so a concurrent invalidation can
+    # only ever orphan a freshly built entry, never serve it as current.
+    versions = get_day_versions(dates)
+    keys = {day: f"availability:occupancy:{day.isoformat()}:{versions[day]}" for day in dates}
+    cached = cache.get_many(keys.values())
+    occupancies = {}
+    missing = []
+    for day, key in keys.items():
+        entry = cached.get(key)
+        if entry and entry[0] == slot_minutes:
+            occupancies[day] = array("H", entry[1])
+        else:
+            missing.append(day)
+    record_cache_lookups("availability", len(keys) - len(missing), len(missing))
+    if missing:
+        fresh = {day: array("H", [0]) * get_day_grid(day, slot_minutes, tz)[1] for day in missing}
+        rows = SlotOccupancy.objects.filter(date__gte=min(missing), date__lte=max(missing), count__gt=0)
+        for day, slot_index, count in rows.values_list("date", "slot_index", "count"):
+            if day in fresh and slot_index < len(fresh[day]):
+                fresh[day][slot_index] = count
+        occupancies.update(fresh)
+        cache.set_many({keys[day]: (slot_minutes, occupancies[day].tobytes()) for day in missing}, OCCUPANCY_CACHE_TIMEOUT)
+    return occupancies
+
+
+def get_window_occupancy(starts_at, slot_count, slot_minutes, tz, day_occupancy=None):
+    target_date = starts_at.astimezone(tz).date()
+    grid_start, day_slot_count = get_day_grid(target_date, slot_minutes, tz)
+    offset = get_grid_offset(grid_start, starts_at, slot_minutes)
+    if offset is None or offset + slot_count > day_slot_count:
+        range_end = starts_at + timedelta(minutes=slot_minutes * slot_count)
+        return build_occupancy(starts_at, slot_minutes, slot_count, load_booking_intervals(starts_at, range_end))
+    if day_occupancy is None:
+        day_occupancy = get_occupancy_for_dates([target_date], slot_minutes, tz)[target_date]
+    return day_occupancy[offset:offset + slot_count]
+
+
+def get_day_start_slots(target_date, duration_minutes, working_hour, slot_minutes, capacity, tz, now, day_occupancy=None):
+    if duration_minutes <= 0 or not working_hour:
+        return []
+    first_start, day_end = get_day_bounds(target_date, working_hour, slot_minutes, tz, now)
+    candidate_count = count_start_candidates(first_start, day_end, slot_minutes, duration_minutes)
+    if not candidate_count:
+        return []
+    window = slots_needed(duration_minutes, slot_minutes)
+    occupancy = get_window_occupancy(first_start, candidate_count + window - 1, slot_minutes, tz, day_occupancy)
+    slot = timedelta(minutes=slot_minutes)
+    return [first_start + slot * index for index in find_free_windows(occupancy, window, capacity)]
+
+
+def get_range_start_slots(start_date, days, duration_minutes, working_hours, slot_minutes, capacity, tz, now):
+    dates = [start_date + timedelta(days=offset) for offset in range(days)]
+    occupancies = get_occupancy_for_dates([day for day in dates if day.weekday() in working_hours], slot_minutes, tz)
+    return {
+        day: get_day_start_slots(
+            day,
+            duration_minutes,
+            working_hours[day.weekday()],
+            slot_minutes,
+            capacity,
+            tz,
+            now,
+            day_occupancy=occupancies[day],
+        )
+        if day in occupancies
+        else None
+        for day in dates
+    }
+
+
+def has_free_capacity(starts_at, duration_minutes, slot_minutes, capacity, tz):
+    window = slots_needed(duration_minutes, slot_minutes)
+    return bool(find_free_windows(get_window_occupancy(starts_at, window, slot_minutes, tz), window, capacity))
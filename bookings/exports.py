@@ -0,0 +1,92 @@
+import csv
+from datetime import datetime, time, timedelta
+
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from bookings.models import Booking, BookingItem
+
+EXPORT_CHUNK_SIZE = 500
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+EXPORT_COLUMNS = [
+    "reference",
+    "date",
+    "start",
+    "end",
+    "status",
+    "customer_name",
+    "phone",
+    "email",
+    "note",
+    "booking_duration_minutes",
+    "booking_total_price",
+    "service_name",
+    "category",
+    "subcategory",
+    "item_duration_minutes",
+    "item_price",
+]
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def escape_formula(value):
+    # Customer input must not be run as a spreadsheet formula, so cells that
+    # would start one are prefixed with an apostrophe.
+    return f"'{value}" if value.startswith(FORMULA_PREFIXES) else value
+
+
+def format_decimal(value, decimal_separator):
+    return f"{value:.2f}".replace(".", decimal_separator)
+
+
+def iter_booking_rows(start_date, end_date, tz, decimal_separator="."):
+    # Bookings are read in chunks with their items prefetched per chunk, so
+    # memory stays bounded by the chunk size whatever the range.
+    range_start = timezone.make_aware(datetime.combine(start_date, time.min), tz)
+    range_end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz)
+    bookings = (
+        Booking.objects.filter(starts_at__gte=range_start, starts_at__lt=range_end)
+        .order_by("starts_at", "pk")
+        .prefetch_related(Prefetch("items", queryset=BookingItem.objects.order_by("pk")))
+    )
+    for booking in bookings.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        starts_at = booking.starts_at.astimezone(tz)
+        booking_columns = [
+            booking.reference,
+            starts_at.date().isoformat(),
+            starts_at.strftime("%H:%M"),
+            booking.ends_at.astimezone(tz).strftime("%H:%M") if booking.ends_at else "",
+            booking.status,
+            escape_formula(booking.customer_name),
+            escape_formula(booking.phone),
+            escape_formula(booking.email),
+            escape_formula(booking.note),
+            booking.total_duration_minutes,
+            format_decimal(booking.total_price, decimal_separator),
+        ]
+        items = booking.items.all()
+        if not items:
+            yield booking_columns + ["", "", "", "", ""]
+        for item in items:
+            yield booking_columns + [
+                escape_formula(item.service_name),
+                escape_formula(item.category),
+                escape_formula(item.subcategory),
+                item.duration_minutes,
+                format_decimal(item.price, decimal_separator),
+            ]
+
+
+def stream_bookings_csv(start_date, end_date, tz, excel=True):
+    # The Excel flavour starts with a BOM and uses ";" and decimal commas so
+    # a German Excel opens it without the import wizard.
+    writer = csv.writer(Echo(), delimiter=";" if excel else ",")
+    if excel:
+        yield "﻿"
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in iter_booking_rows(start_date, end_date, tz, decimal_separator="," if excel else "."):
+        yield writer.writerow(row)
@@ -0,0 +1,100 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import Prefetch
+
+from bookings.models import Booking, BookingItem
+
+ICS_CHUNK_SIZE = 500
+ICS_DEFAULT_DAYS = 90
+ICS_MAX_DAYS = 730
+ICS_CACHE_MAX_DAYS = 92
+ICS_CACHE_TIMEOUT = 60 * 60 * 24
+ICS_STATUSES = {
+    Booking.Status.CONFIRMED: "CONFIRMED",
+    Booking.Status.PENDING: "TENTATIVE",
+}
+
+
+def escape_text(value):
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold_line(line):
+    # Content lines are limited to 75 octets; continuations start with a space.
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+        limit = 74
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def format_utc(value):
+    return value.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def build_event(booking, site_settings, stamp):
+    items = booking.items.all()
+    services = ", ".join(item.service_name for item in items)
+    description = [
+        f"{booking.reference}",
+        f"{booking.phone} · {booking.email}",
+        f"{booking.total_duration_minutes} min · {booking.total_price:.2f} {site_settings.currency_code}",
+    ]
+    if services:
+        description.append(services)
+    if booking.note:
+        description.append(booking.note)
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{booking.reference}@{site_settings.domain}",
+        f"DTSTAMP:{stamp}",
+        f"DTSTART:{format_utc(booking.starts_at)}",
+        f"DTEND:{format_utc(booking.ends_at or booking.starts_at)}",
+        f"SUMMARY:{escape_text(f'{booking.customer_name} – {services}' if services else booking.customer_name)}",
+        f"DESCRIPTION:{escape_text(chr(10).join(description))}",
+        f"STATUS:{ICS_STATUSES.get(booking.status, 'CONFIRMED')}",
+        "END:VEVENT",
+    ]
+    return "".join(fold_line(line) for line in lines)
+
+
+def iter_calendar(range_start, range_end, site_settings):
+    # One chunk per event, read with .iterator() and the items prefetched per
+    # chunk of bookings, so long ranges can be streamed.
+    stamp = format_utc(datetime.now(dt_timezone.utc))
+    yield "".join(
+        fold_line(line)
+        for line in (
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            f"PRODID:-//{escape_text(site_settings.site_name)}//Bookings//EN",
+            "CALSCALE:GREGORIAN",
+            "METHOD:PUBLISH",
+            f"X-WR-CALNAME:{escape_text(site_settings.site_name)}",
+            f"X-WR-TIMEZONE:{site_settings.timezone}",
+        )
+    )
+    bookings = (
+        Booking.objects.filter(starts_at__gte=range_start, starts_at__lt=range_end)
+        .exclude(status=Booking.Status.CANCELLED)
+        .order_by("starts_at", "pk")
+        .prefetch_related(Prefetch("items", queryset=BookingItem.objects.order_by("pk")))
+    )
+    for booking in bookings.iterator(chunk_size=ICS_CHUNK_SIZE):
+        yield build_event(booking, site_settings, stamp)
+    yield fold_line("END:VCALENDAR")
@@ -0,0 +1,177 @@
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time as timer
+from datetime import time, timedelta
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from bookings.occupancy import rebuild_slot_occupancy
+from bookings.stats import rebuild_daily_stats
+from bookings.synthetic import build_synthetic_services, insert_synthetic_bookings, iter_synthetic_bookings
+from bookings.views import get_available_start_slots, get_booking_timezone
+from core.models import SiteSettings, WorkingHour
+from services.models import Service
+
+BENCHMARK_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "benchmark"}}
+BOOKINGS_PER_DAY = 25
+
+
+class Command(BaseCommand):
+    help = "Time the booking hot paths against generated datasets in a throwaway test database and write JSON results"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bookings", type=int, nargs="+", default=[1000, 10000, 100000])
+        parser.add_argument("--services", type=int, nargs="+", default=[50, 500])
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per case; the first run starts with an empty cache")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--output", default="benchmark-results.json")
+
+    def handle(self, *args, **options):
+        # Everything runs in a separate test database with a private
+        # in-memory cache, so neither real data nor shared caches are touched.
+        setup_test_environment()
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHES, DEBUG=False):
+                old_config = setup_databases(verbosity=0, interactive=False, aliases={"default"})
+                try:
+                    results = self.run_datasets(options)
+                finally:
+                    teardown_databases(old_config, verbosity=0)
+        finally:
+            teardown_test_environment()
+
+        report = {
+            "commit": self.get_commit(),
+            "created_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "repeat": options["repeat"],
+            "results": results,
+        }
+        with open(options["output"], "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} results to {options['output']}"))
+
+    def get_commit(self):
+        try:
+            return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+
+    def run_datasets(self, options):
+        results = []
+        for service_count in options["services"]:
+            for booking_count in options["bookings"]:
+                self.stdout.write(self.style.MIGRATE_HEADING(f"{booking_count} bookings, {service_count} services"))
+                self.load_dataset(booking_count, service_count, random.Random(options["seed"]))
+                for case, run in self.get_cases():
+                    result = {"case": case, "bookings": booking_count, "services": service_count}
+                    result.update(self.measure(run, options["repeat"]))
+                    results.append(result)
+                    self.stdout.write(
+                        f"  {case}: cold {result['cold_seconds'] * 1000:.1f} ms / {result['cold_queries']} queries, "
+                        f"warm {result['warm_seconds_median'] * 1000:.1f} ms / {result['warm_queries']} queries"
+                    )
+        return results
+
+    def load_dataset(self, booking_count, service_count, rng):
+        call_command("flush", interactive=False, verbosity=0)
+        cache.clear()
+        SiteSettings.objects.create(site_name="Benchmark", booking_slot_minutes=15, concurrent_capacity=3)
+        for weekday in range(7):
+            WorkingHour.objects.create(weekday=weekday, is_open=True, open_time=time(9, 0), close_time=time(18, 0))
+        Service.objects.bulk_create(build_synthetic_services(service_count, rng))
+        services = list(Service.objects.all())
+
+        tz = get_booking_timezone()
+        days = max(30, booking_count // BOOKINGS_PER_DAY)
+        self.today = timezone.now().astimezone(tz).date()
+        start_date = self.today - timedelta(days=days * 3 // 4)
+        insert_synthetic_bookings(iter_synthetic_bookings(booking_count, services, start_date, days, tz, rng))
+        rebuild_slot_occupancy(15, tz)
+        rebuild_daily_stats(tz)
+
+        self.slot_date = self.today + timedelta(days=1)
+        self.post_date = start_date + timedelta(days=days + 7)
+        self.post_count = 0
+        self.services = services[:2]
+        self.staff = get_user_model().objects.create_user("benchmark", password="benchmark", is_staff=True)
+
+    def get_cases(self):
+        duration = sum(service.duration_minutes for service in self.services)
+        service_ids = [service.pk for service in self.services]
+        anonymous = Client()
+        staff = Client()
+        staff.force_login(self.staff)
+        return [
+            ("get_available_start_slots", lambda: get_available_start_slots(self.slot_date, duration)),
+            (
+                "available_slots_view",
+                lambda: anonymous.get(reverse("available_slots"), {"date": self.slot_date.isoformat(), "services": service_ids}),
+            ),
+            ("booking_create_post", lambda: self.post_booking(anonymous, service_ids)),
+            ("service_list_view", lambda: anonymous.get(reverse("service_list"))),
+            ("dashboard_view", lambda: staff.get(reverse("admin_dashboard"))),
+        ]
+
+    def post_booking(self, client, service_ids):
+        # Every POST takes the next free hour after the generated range.
+        appointment_date = self.post_date + timedelta(days=self.post_count // 8)
+        appointment_time = time(9 + self.post_count % 8)
+        self.post_count += 1
+        response = client.post(
+            reverse("booking_create"),
+            {
+                "customer_name": "Benchmark Guest",
+                "phone": "0",
+                "email": "benchmark@example.com",
+                "appointment_date": appointment_date.isoformat(),
+                "appointment_time": appointment_time.strftime("%H:%M"),
+                "services": service_ids,
+            },
+        )
+        if response.status_code != 302:
+            raise RuntimeError("Benchmark booking was not created")
+        return response
+
+    def measure(self, run, repeat):
+        cache.clear()
+        seconds = []
+        queries = []
+        for _ in range(max(repeat, 1)):
+            with CaptureQueriesContext(connection) as context:
+                started = timer.perf_counter()
+                response = run()
+                seconds.append(timer.perf_counter() - started)
+            queries.append(len(context.captured_queries))
+            status_code = getattr(response, "status_code", None)
+            if status_code is not None and status_code >= 400:
+                raise RuntimeError(f"Benchmark request failed with status {status_code}")
+        warm = seconds[1:] or seconds
+        return {
+            "cold_seconds": seconds[0],
+            "cold_queries": queries[0],
+            "warm_seconds_median": statistics.median(warm),
+            "warm_seconds_min": min(warm),
+            "warm_queries": queries[-1],
+            "runs": seconds,
+        }
@@ -0,0 +1,74 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from bookings.availability import get_longest_booking, get_overlapping_bookings
+from bookings.models import Booking
+from bookings.views import get_local_date_range
+
+
+class Command(BaseCommand):
+    help = "Print the query plans of the booking range queries used by the calendar, dashboard and availability checks"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bookings",
+            type=int,
+            default=0,
+            help="Insert this many synthetic bookings first; they are rolled back afterwards",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options["bookings"]:
+                self.insert_synthetic_bookings(options["bookings"])
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Booking._meta.db_table}")
+            for label, queryset in self.get_queries():
+                self.stdout.write(self.style.MIGRATE_HEADING(label))
+                self.stdout.write(queryset.explain())
+            transaction.set_rollback(True)
+
+    def get_queries(self):
+        today = timezone.localdate()
+        week_start = today - timedelta(days=today.weekday())
+        week_range = get_local_date_range(week_start, week_start + timedelta(days=7))
+        day_range = get_local_date_range(today, today + timedelta(days=1))
+        active = Booking.objects.exclude(status=Booking.Status.CANCELLED)
+        return [
+            ("Calendar week", active.filter(starts_at__gte=week_range[0], starts_at__lt=week_range[1]).order_by("starts_at")),
+            ("Dashboard today", active.filter(starts_at__gte=day_range[0], starts_at__lt=day_range[1])),
+            (
+                "Availability window",
+                get_overlapping_bookings(day_range[0], day_range[1], get_longest_booking() or timedelta(0)).values_list(
+                    "starts_at", "ends_at"
+                ),
+            ),
+        ]
+
+    def insert_synthetic_bookings(self, count):
+        # Spread over two years around today; bulk_create skips the save
+        # signals, so slot counters and caches are left alone.
+        origin = timezone.now() - timedelta(days=365)
+        statuses = [Booking.Status.CONFIRMED, Booking.Status.CONFIRMED, Booking.Status.PENDING, Booking.Status.CANCELLED]
+        bookings = []
+        for index in range(count):
+            starts_at = origin + timedelta(minutes=15 * (index * 7919 % (730 * 96)))
+            bookings.append(
+                Booking(
+                    reference=f"LKX{index:010d}",
+                    customer_name="Synthetic Guest",
+                    phone="0",
+                    email="guest@example.com",
+                    status=statuses[index % len(statuses)],
+                    starts_at=starts_at,
+                    ends_at=starts_at + timedelta(minutes=60),
+                    total_duration_minutes=60,
+                    total_price=Decimal("40.00"),
+                )
+            )
+        Booking.objects.bulk_create(bookings, batch_size=2000)
+        self.stdout.write(f"Inserted {count} synthetic bookings.")
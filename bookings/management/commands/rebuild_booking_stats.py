@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from bookings.models import BookingDailyStats
+from bookings.stats import rebuild_daily_stats
+from core.settings_cache import get_settings_snapshot
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily booking statistics from bookings"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=parse_date, help="First date to rebuild (YYYY-MM-DD)")
+        parser.add_argument("--end", type=parse_date, help="Last date to rebuild (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild_daily_stats(get_settings_snapshot().timezone, start_date=options["start"], end_date=options["end"])
+        self.stdout.write(self.style.SUCCESS(f"Booking stats rebuilt: {BookingDailyStats.objects.count()} days."))
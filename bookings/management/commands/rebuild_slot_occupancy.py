@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from bookings.availability import bump_availability_version
+from bookings.models import SlotOccupancy
+from bookings.occupancy import rebuild_slot_occupancy
+from core.settings_cache import get_settings_snapshot
+
+
+class Command(BaseCommand):
+    help = "Rebuild the slot occupancy counters from bookings"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=parse_date, help="First date to rebuild (YYYY-MM-DD)")
+        parser.add_argument("--end", type=parse_date, help="Last date to rebuild (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        snapshot = get_settings_snapshot()
+        with transaction.atomic():
+            rebuild_slot_occupancy(
+                snapshot.effective_settings.booking_slot_minutes,
+                snapshot.timezone,
+                start_date=options["start"],
+                end_date=options["end"],
+            )
+        bump_availability_version()
+        self.stdout.write(self.style.SUCCESS(f"Slot occupancy rebuilt: {SlotOccupancy.objects.count()} slots in use."))
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.12 on 2026-10-18 14:59
+
+from collections import Counter
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def compute_slot_counts(intervals, slot_minutes, tz):
+    # A frozen copy of the slot counting in bookings.occupancy, so this
+    # migration does not change when the app code does.
+    slot = timedelta(minutes=slot_minutes)
+    counts = Counter()
+    for starts_at, ends_at in intervals:
+        day = starts_at.astimezone(tz).date()
+        while day <= ends_at.astimezone(tz).date():
+            grid_start = timezone.make_aware(datetime.combine(day, time.min), tz).astimezone(dt_timezone.utc)
+            grid_end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min), tz).astimezone(dt_timezone.utc)
+            first = max((starts_at - grid_start) // slot, 0)
+            last = min(-((grid_start - ends_at) // slot), -((grid_start - grid_end) // slot))
+            counts.update((day, index) for index in range(first, last))
+            day += timedelta(days=1)
+    return counts
+
+
+def populate_slot_occupancy(apps, schema_editor):
+    Booking = apps.get_model("bookings", "Booking")
+    SiteSettings = apps.get_model("core", "SiteSettings")
+    SlotOccupancy = apps.get_model("bookings", "SlotOccupancy")
+    site_settings = SiteSettings.objects.first()
+    slot_minutes = site_settings.booking_slot_minutes if site_settings else 15
+    tz = ZoneInfo((site_settings.timezone if site_settings else "") or settings.TIME_ZONE)
+    intervals = (
+        Booking.objects.exclude(status="cancelled")
+        .exclude(ends_at__isnull=True)
+        .values_list("starts_at", "ends_at")
+        .iterator()
+    )
+    SlotOccupancy.objects.bulk_create(
+        (
+            SlotOccupancy(date=day, slot_index=index, count=count)
+            for (day, index), count in compute_slot_counts(intervals, slot_minutes, tz).items()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+        ('core', '0006_emailtemplate_html_body'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('slot_index', models.PositiveSmallIntegerField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['date', 'slot_index'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'slot_index'), name='bookings_slotoccupancy_unique_slot'), models.CheckConstraint(condition=models.Q(('count__gte', 0)), name='bookings_slotoccupancy_count_gte_0')],
+            },
+        ),
+        migrations.RunPython(populate_slot_occupancy, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.12 on 2026-10-18 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_slotoccupancy'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='booking',
+            name='reference',
+            field=models.CharField(blank=True, max_length=24, unique=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.12 on 2026-10-18 15:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_booking_reference_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['starts_at', 'ends_at'], name='bookings_starts_ends_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status', 'cancelled'), _negated=True), fields=['starts_at', 'ends_at'], name='bookings_active_starts_idx'),
+        ),
+    ]
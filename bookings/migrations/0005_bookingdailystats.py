@@ -0,0 +1,70 @@
+# Generated by Django 5.2.12 on 2026-10-18 15:13
+
+from collections import Counter, defaultdict
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import migrations, models
+
+STATUS_COUNT_FIELDS = {
+    "confirmed": "confirmed_count",
+    "pending": "pending_count",
+    "cancelled": "cancelled_count",
+}
+
+
+def compute_daily_stats(bookings_stats, tz):
+    # A frozen copy of the rollup in bookings.stats, so this migration does
+    # not change when the app code does.
+    totals = defaultdict(Counter)
+    for starts_at, status, total_price, total_duration_minutes in bookings_stats:
+        if not starts_at or status not in STATUS_COUNT_FIELDS:
+            continue
+        day_totals = totals[starts_at.astimezone(tz).date()]
+        day_totals[STATUS_COUNT_FIELDS[status]] += 1
+        if status != "cancelled":
+            day_totals["revenue"] += total_price or 0
+            day_totals["booked_minutes"] += total_duration_minutes or 0
+    return totals
+
+
+def populate_daily_stats(apps, schema_editor):
+    Booking = apps.get_model("bookings", "Booking")
+    BookingDailyStats = apps.get_model("bookings", "BookingDailyStats")
+    SiteSettings = apps.get_model("core", "SiteSettings")
+    site_settings = SiteSettings.objects.first()
+    tz = ZoneInfo((site_settings.timezone if site_settings else "") or settings.TIME_ZONE)
+    totals = compute_daily_stats(Booking.objects.values_list("starts_at", "status", "total_price", "total_duration_minutes").iterator(), tz)
+    BookingDailyStats.objects.bulk_create(
+        (BookingDailyStats(date=day, **day_totals) for day, day_totals in totals.items()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_booking_range_indexes'),
+        ('core', '0007_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('confirmed_count', models.IntegerField(default=0)),
+                ('pending_count', models.IntegerField(default=0)),
+                ('cancelled_count', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('booked_minutes', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'booking daily stats',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.RunPython(populate_daily_stats, migrations.RunPython.noop),
+    ]
@@ -2,19 +2,36 @@ from datetime import timedelta
 from decimal import Decimal
 
 from django.db import models
-from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from bookings.references import generate_booking_reference
+from bookings.signals import bookings_updated
 from services.models import Service
 
 
+class BookingQuerySet(models.QuerySet):
+    schedule_fields = {"starts_at", "ends_at", "status", "total_duration_minutes", "total_price"}
+
+    def update(self, **kwargs):
+        if not self.schedule_fields.intersection(kwargs):
+            return super().update(**kwargs)
+        affected = list(self.values_list("pk", "starts_at", "ends_at"))
+        updated = super().update(**kwargs)
+        if updated:
+            if {"starts_at", "ends_at"}.intersection(kwargs):
+                pks = [pk for pk, _, _ in affected]
+                affected += list(Booking.objects.filter(pk__in=pks).values_list("pk", "starts_at", "ends_at"))
+            bookings_updated.send(sender=Booking, intervals=[(starts_at, ends_at) for _, starts_at, ends_at in affected])
+        return updated
+
+
 class Booking(models.Model):
     class Status(models.TextChoices):
         PENDING = "pending", _("Pending")
         CONFIRMED = "confirmed", _("Confirmed")
         CANCELLED = "cancelled", _("Cancelled")
 
-    reference = models.CharField(max_length=20, unique=True, blank=True)
+    reference = models.CharField(max_length=24, unique=True, blank=True)
     customer_name = models.CharField(max_length=120)
     phone = models.CharField(max_length=32)
     email = models.EmailField()
@@ -26,12 +43,22 @@ class Booking(models.Model):
     total_price = models.DecimalField(max_digits=8, decimal_places=2, default=Decimal("0.00"))
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = BookingQuerySet.as_manager()
+
     class Meta:
         ordering = ["-starts_at"]
+        indexes = [
+            models.Index(fields=["starts_at", "ends_at"], name="bookings_starts_ends_idx"),
+            models.Index(
+                fields=["starts_at", "ends_at"],
+                condition=~models.Q(status="cancelled"),
+                name="bookings_active_starts_idx",
+            ),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.reference:
-            self.reference = timezone.localtime().strftime("LK%y%m%d%H%M%S")
+            self.reference = generate_booking_reference()
         if self.total_duration_minutes and self.starts_at:
             self.ends_at = self.starts_at + timedelta(minutes=self.total_duration_minutes)
         return super().save(*args, **kwargs)
@@ -58,3 +85,39 @@ class BookingItem(models.Model):
 
     def __str__(self):
         return self.service_name
+
+
+class SlotOccupancy(models.Model):
+    date = models.DateField()
+    slot_index = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["date", "slot_index"]
+        constraints = [
+            models.UniqueConstraint(fields=["date", "slot_index"], name="bookings_slotoccupancy_unique_slot"),
+            models.CheckConstraint(condition=models.Q(count__gte=0), name="bookings_slotoccupancy_count_gte_0"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} #{self.slot_index}: {self.count}"
+
+
+class BookingDailyStats(models.Model):
+    date = models.DateField(unique=True)
+    confirmed_count = models.IntegerField(default=0)
+    pending_count = models.IntegerField(default=0)
+    cancelled_count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    booked_minutes = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["date"]
+        verbose_name_plural = "booking daily stats"
+
+    @property
+    def active_count(self):
+        return self.confirmed_count + self.pending_count
+
+    def __str__(self):
+        return f"{self.date}: {self.active_count} bookings"
@@ -0,0 +1,95 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from bookings.availability import get_day_grid
+from bookings.models import Booking, SlotOccupancy
+
+
+class SlotCapacityExceeded(Exception):
+    pass
+
+
+def get_booking_slots(starts_at, ends_at, slot_minutes, tz):
+    slots = {}
+    if not starts_at or not ends_at:
+        return slots
+    slot = timedelta(minutes=slot_minutes)
+    day = starts_at.astimezone(tz).date()
+    last_day = ends_at.astimezone(tz).date()
+    while day <= last_day:
+        grid_start, slot_count = get_day_grid(day, slot_minutes, tz)
+        first = max((starts_at - grid_start) // slot, 0)
+        last = min(-((grid_start - ends_at) // slot), slot_count)
+        if first < last:
+            slots[day] = range(first, last)
+        day += timedelta(days=1)
+    return slots
+
+
+def get_schedule_slots(schedule, slot_minutes, tz):
+    starts_at, ends_at, status = schedule
+    if status == Booking.Status.CANCELLED:
+        return {}
+    return get_booking_slots(starts_at, ends_at, slot_minutes, tz)
+
+
+def compute_slot_counts(intervals, slot_minutes, tz):
+    counts = Counter()
+    for starts_at, ends_at in intervals:
+        for day, indexes in get_booking_slots(starts_at, ends_at, slot_minutes, tz).items():
+            counts.update((day, index) for index in indexes)
+    return counts
+
+
+def change_slot_counts(slots, delta):
+    for day, indexes in slots.items():
+        rows = SlotOccupancy.objects.filter(date=day, slot_index__gte=indexes.start, slot_index__lt=indexes.stop)
+        if delta > 0:
+            SlotOccupancy.objects.bulk_create(
+                [SlotOccupancy(date=day, slot_index=index) for index in indexes],
+                ignore_conflicts=True,
+            )
+            rows.update(count=F("count") + delta)
+        else:
+            rows.update(count=Greatest(F("count") + delta, 0))
+
+
+def assert_slot_capacity(slots, capacity):
+    # Runs inside the booking transaction after the counters were bumped: the
+    # increments hold the row (or SQLite database) write locks, so a competing
+    # booking only sees our count once we commit and then fails this check.
+    overbooked = Q()
+    for day, indexes in slots.items():
+        overbooked |= Q(date=day, slot_index__gte=indexes.start, slot_index__lt=indexes.stop)
+    if slots and SlotOccupancy.objects.filter(overbooked, count__gt=capacity).exists():
+        raise SlotCapacityExceeded
+
+
+def load_slot_counts(start_date, end_date):
+    return SlotOccupancy.objects.filter(date__gte=start_date, date__lte=end_date, count__gt=0).values_list(
+        "date", "slot_index", "count"
+    )
+
+
+def rebuild_slot_occupancy(slot_minutes, tz, start_date=None, end_date=None):
+    rows = SlotOccupancy.objects.all()
+    bookings = Booking.objects.exclude(status=Booking.Status.CANCELLED).exclude(ends_at__isnull=True)
+    if start_date:
+        rows = rows.filter(date__gte=start_date)
+        bookings = bookings.filter(ends_at__gte=get_day_grid(start_date, slot_minutes, tz)[0])
+    if end_date:
+        rows = rows.filter(date__lte=end_date)
+        bookings = bookings.filter(starts_at__lt=get_day_grid(end_date + timedelta(days=1), slot_minutes, tz)[0])
+    counts = compute_slot_counts(bookings.values_list("starts_at", "ends_at").iterator(), slot_minutes, tz)
+    rows.delete()
+    SlotOccupancy.objects.bulk_create(
+        (
+            SlotOccupancy(date=day, slot_index=index, count=count)
+            for (day, index), count in counts.items()
+            if (not start_date or day >= start_date) and (not end_date or day <= end_date)
+        ),
+        batch_size=1000,
+    )
@@ -0,0 +1,142 @@
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from bookings.availability import bump_availability_version, bump_bookings_version, invalidate_day_occupancy
+from bookings.models import Booking, BookingItem
+from bookings.occupancy import change_slot_counts, get_schedule_slots, rebuild_slot_occupancy
+from bookings.signals import bookings_updated
+from bookings.stats import change_daily_stats, rebuild_daily_stats
+from core.models import SiteSettings, WorkingHour
+from core.settings_cache import get_settings_snapshot
+
+
+def get_booking_grid(site_settings=None):
+    if site_settings is None:
+        snapshot = get_settings_snapshot()
+        return snapshot.effective_settings.booking_slot_minutes, snapshot.timezone
+    return site_settings.booking_slot_minutes, ZoneInfo(site_settings.timezone or settings.TIME_ZONE)
+
+
+def get_local_dates(intervals, tz):
+    dates = set()
+    for starts_at, ends_at in intervals:
+        if not starts_at:
+            continue
+        day = starts_at.astimezone(tz).date()
+        last_day = (ends_at or starts_at).astimezone(tz).date()
+        while day <= last_day:
+            dates.add(day)
+            day += timedelta(days=1)
+    return dates
+
+
+def invalidate_dates(dates):
+    # Invalidate now for this process and again after commit, so a reader that
+    # rebuilt the cache from pre-commit rows in between cannot keep it.
+    invalidate_day_occupancy(dates)
+    transaction.on_commit(lambda: invalidate_day_occupancy(dates))
+
+
+def load_stored_state(instance):
+    starts_at, ends_at, status, total_price, total_duration_minutes = (
+        Booking.objects.filter(pk=instance.pk)
+        .values_list("starts_at", "ends_at", "status", "total_price", "total_duration_minutes")
+        .first()
+        or (None, None, None, None, None)
+    )
+    instance._loaded_schedule = (starts_at, ends_at, status)
+    instance._loaded_stats = (starts_at, status, total_price, total_duration_minutes)
+
+
+@receiver(pre_save, sender=Booking)
+def booking_loading_schedule(sender, instance, **kwargs):
+    # Compared against what is stored, not what this instance loaded: another
+    # copy may have moved the booking since, or the schedule fields may be
+    # deferred.
+    if not instance._state.adding:
+        load_stored_state(instance)
+
+
+@receiver(pre_delete, sender=Booking)
+def booking_deleting(sender, instance, **kwargs):
+    # The in-memory state may predate a queryset update, so counters are
+    # decremented by what is actually stored.
+    load_stored_state(instance)
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, **kwargs):
+    schedule = (instance.starts_at, instance.ends_at, instance.status)
+    loaded = getattr(instance, "_loaded_schedule", (None, None, None))
+    if schedule != loaded:
+        slot_minutes, tz = get_booking_grid()
+        old_slots = get_schedule_slots(loaded, slot_minutes, tz)
+        new_slots = get_schedule_slots(schedule, slot_minutes, tz)
+        change_slot_counts(old_slots, -1)
+        change_slot_counts(new_slots, 1)
+        invalidate_dates(set(old_slots) | set(new_slots))
+    instance._loaded_schedule = schedule
+
+    stats = (instance.starts_at, instance.status, instance.total_price, instance.total_duration_minutes)
+    loaded_stats = getattr(instance, "_loaded_stats", (None, None, None, None))
+    if stats != loaded_stats:
+        change_daily_stats(loaded_stats, stats, get_booking_grid()[1])
+    instance._loaded_stats = stats
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, **kwargs):
+    schedule = getattr(instance, "_loaded_schedule", (instance.starts_at, instance.ends_at, instance.status))
+    slot_minutes, tz = get_booking_grid()
+    slots = get_schedule_slots(schedule, slot_minutes, tz)
+    change_slot_counts(slots, -1)
+    invalidate_dates(set(slots))
+    stats = getattr(instance, "_loaded_stats", (instance.starts_at, instance.status, instance.total_price, instance.total_duration_minutes))
+    change_daily_stats(stats, None, tz)
+
+
+@receiver(bookings_updated, sender=Booking)
+def bookings_bulk_updated(sender, intervals, **kwargs):
+    slot_minutes, tz = get_booking_grid()
+    dates = get_local_dates(intervals, tz)
+    if dates:
+        rebuild_slot_occupancy(slot_minutes, tz, start_date=min(dates), end_date=max(dates))
+        rebuild_daily_stats(tz, start_date=min(dates), end_date=max(dates))
+        invalidate_dates(dates)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=BookingItem)
+@receiver(post_delete, sender=BookingItem)
+@receiver(bookings_updated, sender=Booking)
+def bookings_changed(sender, **kwargs):
+    bump_bookings_version()
+
+
+@receiver(pre_save, sender=SiteSettings)
+def site_settings_loading_grid(sender, instance, **kwargs):
+    instance._previous_grid = get_booking_grid()
+
+
+@receiver(post_save, sender=SiteSettings)
+def site_settings_saved(sender, instance, **kwargs):
+    slot_minutes, tz = get_booking_grid(instance)
+    previous_grid = getattr(instance, "_previous_grid", None)
+    if previous_grid != (slot_minutes, tz):
+        rebuild_slot_occupancy(slot_minutes, tz)
+    if previous_grid is None or previous_grid[1] != tz:
+        rebuild_daily_stats(tz)
+    bump_availability_version()
+
+
+@receiver(post_delete, sender=SiteSettings)
+@receiver(post_save, sender=WorkingHour)
+@receiver(post_delete, sender=WorkingHour)
+def availability_settings_changed(sender, **kwargs):
+    bump_availability_version()
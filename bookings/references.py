@@ -0,0 +1,30 @@
+import itertools
+import os
+import threading
+
+from django.utils import timezone
+
+REFERENCE_PREFIX = "LK"
+COUNTER_SIZE = 36 ** 2
+
+_counter = itertools.count()
+_lock = threading.Lock()
+
+
+def to_base36(value, width):
+    digits = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    encoded = ""
+    while value:
+        value, remainder = divmod(value, 36)
+        encoded = digits[remainder] + encoded
+    return encoded.rjust(width, "0")[-width:]
+
+
+def generate_booking_reference(now=None):
+    # LK + local timestamp to the second + worker pid + per-process counter,
+    # e.g. LK261018143005001XF07. The pid keeps workers apart and the counter
+    # keeps up to 1296 references per second and process apart.
+    now = timezone.localtime(now)
+    with _lock:
+        sequence = next(_counter) % COUNTER_SIZE
+    return f"{REFERENCE_PREFIX}{now:%y%m%d%H%M%S}{to_base36(os.getpid(), 5)}{to_base36(sequence, 2)}"
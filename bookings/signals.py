@@ -0,0 +1,3 @@
+from django.dispatch import Signal
+
+bookings_updated = Signal()
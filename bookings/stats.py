@@ -0,0 +1,62 @@
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from bookings.models import Booking, BookingDailyStats
+
+STATUS_COUNT_FIELDS = {
+    Booking.Status.CONFIRMED: "confirmed_count",
+    Booking.Status.PENDING: "pending_count",
+    Booking.Status.CANCELLED: "cancelled_count",
+}
+STATS_FIELDS = ["starts_at", "status", "total_price", "total_duration_minutes"]
+
+
+def add_booking_stats(totals, booking_stats, tz, sign=1):
+    if booking_stats is None:
+        return
+    starts_at, status, total_price, total_duration_minutes = booking_stats
+    if not starts_at or status not in STATUS_COUNT_FIELDS:
+        return
+    day_totals = totals[starts_at.astimezone(tz).date()]
+    day_totals[STATUS_COUNT_FIELDS[status]] += sign
+    if status != Booking.Status.CANCELLED:
+        day_totals["revenue"] += sign * (total_price or 0)
+        day_totals["booked_minutes"] += sign * (total_duration_minutes or 0)
+
+
+def compute_daily_stats(bookings_stats, tz):
+    totals = defaultdict(Counter)
+    for booking_stats in bookings_stats:
+        add_booking_stats(totals, booking_stats, tz)
+    return totals
+
+
+def change_daily_stats(old_stats, new_stats, tz):
+    totals = defaultdict(Counter)
+    add_booking_stats(totals, old_stats, tz, -1)
+    add_booking_stats(totals, new_stats, tz)
+    for day, changes in totals.items():
+        changes = {field: value for field, value in changes.items() if value}
+        if changes:
+            BookingDailyStats.objects.bulk_create([BookingDailyStats(date=day)], ignore_conflicts=True)
+            BookingDailyStats.objects.filter(date=day).update(**{field: F(field) + value for field, value in changes.items()})
+
+
+def rebuild_daily_stats(tz, start_date=None, end_date=None):
+    rows = BookingDailyStats.objects.all()
+    bookings = Booking.objects.all()
+    if start_date:
+        rows = rows.filter(date__gte=start_date)
+        bookings = bookings.filter(starts_at__gte=timezone.make_aware(datetime.combine(start_date, time.min), tz))
+    if end_date:
+        rows = rows.filter(date__lte=end_date)
+        bookings = bookings.filter(starts_at__lt=timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz))
+    totals = compute_daily_stats(bookings.values_list(*STATS_FIELDS).iterator(), tz)
+    rows.delete()
+    BookingDailyStats.objects.bulk_create(
+        (BookingDailyStats(date=day, **day_totals) for day, day_totals in totals.items()),
+        batch_size=1000,
+    )
@@ -0,0 +1,146 @@
+from collections import Counter
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from bookings.availability import get_day_grid
+from bookings.models import Booking, BookingItem
+from services.models import Service
+
+SYNTHETIC_CATEGORIES = [
+    ("Nails", ["Manicure", "Pedicure", "Gel"]),
+    ("Lashes", ["Extensions", "Lifting"]),
+    ("Brows", ["-"]),
+]
+SYNTHETIC_PLACEMENT_ATTEMPTS = 20
+SYNTHETIC_STATUSES = [Booking.Status.CONFIRMED] * 6 + [Booking.Status.PENDING] * 3 + [Booking.Status.CANCELLED]
+
+
+def build_synthetic_services(count, rng, prefix="Synthetic", first_index=0):
+    # Slugs are set here because bulk_create skips Service.save().
+    services = []
+    for index in range(first_index, first_index + count):
+        category, subcategories = SYNTHETIC_CATEGORIES[index % len(SYNTHETIC_CATEGORIES)]
+        services.append(
+            Service(
+                name=f"{prefix} {category} {index + 1}",
+                slug=f"{prefix.lower()}-{category.lower()}-{index + 1}",
+                category=category,
+                subcategory=subcategories[index % len(subcategories)],
+                price=Decimal(rng.randrange(1500, 9000, 50)) / 100,
+                duration_minutes=rng.choice([15, 30, 45, 60, 90]),
+                booking_count=rng.randrange(0, 50),
+                featured=index % 10 == 0,
+            )
+        )
+    return services
+
+
+def get_open_minutes(open_hours, day):
+    if open_hours is None:
+        return 9 * 60, 18 * 60
+    working_hour = open_hours.get(day.weekday())
+    if working_hour is None:
+        return None
+    return (
+        working_hour.open_time.hour * 60 + working_hour.open_time.minute,
+        working_hour.close_time.hour * 60 + working_hour.close_time.minute,
+    )
+
+
+def iter_synthetic_bookings(
+    count,
+    services,
+    start_date,
+    days,
+    tz,
+    rng,
+    slot_minutes=15,
+    reference_prefix="LKS",
+    open_hours=None,
+    capacity=None,
+    slot_counts=None,
+):
+    # Yields unsaved (booking, services) pairs inside the opening hours (09:00-18:00
+    # on every day without open_hours). With a capacity, bookings that find no
+    # free place after a few tries are dropped, so fewer than count may come out.
+    slot_counts = Counter() if slot_counts is None else slot_counts
+    # Per-day values are worked out once: the day, its open minutes, local
+    # midnight and how far that lies from the slot grid start, in minutes.
+    day_info = {}
+    for index in range(count):
+        booked = rng.sample(services, min(len(services), rng.choice([1, 1, 1, 2, 2, 3])))
+        duration = sum(service.duration_minutes for service in booked)
+        status = rng.choice(SYNTHETIC_STATUSES)
+        starts_at = None
+        for _ in range(SYNTHETIC_PLACEMENT_ATTEMPTS):
+            day_offset = rng.randrange(days)
+            if day_offset not in day_info:
+                day = start_date + timedelta(days=day_offset)
+                day_start = timezone.make_aware(datetime.combine(day, time.min), tz)
+                grid_shift = (day_start - get_day_grid(day, slot_minutes, tz)[0]) // timedelta(minutes=1)
+                day_info[day_offset] = (day, get_open_minutes(open_hours, day), day_start, grid_shift)
+            day, open_minutes, day_start, grid_shift = day_info[day_offset]
+            if open_minutes is None or open_minutes[1] - open_minutes[0] < duration:
+                continue
+            offset = open_minutes[0] + slot_minutes * rng.randrange((open_minutes[1] - open_minutes[0] - duration) // slot_minutes + 1)
+            if capacity is not None and status != Booking.Status.CANCELLED:
+                # Same slots as get_booking_slots for a booking within one day.
+                first = (grid_shift + offset) // slot_minutes
+                last = -(-(grid_shift + offset + duration) // slot_minutes)
+                slots = [(day, slot_index) for slot_index in range(first, last)]
+                if any(slot_counts[key] >= capacity for key in slots):
+                    continue
+                slot_counts.update(slots)
+            starts_at = day_start + timedelta(minutes=offset)
+            break
+        if starts_at is None:
+            continue
+        booking = Booking(
+            reference=f"{reference_prefix}{index:010d}",
+            customer_name=f"Guest {index + 1}",
+            phone=f"+49 151 {index:07d}",
+            email=f"guest{index + 1}@example.com",
+            status=status,
+            starts_at=starts_at,
+            ends_at=starts_at + timedelta(minutes=duration),
+            total_duration_minutes=duration,
+            total_price=sum((service.price for service in booked), Decimal("0.00")),
+        )
+        yield booking, booked
+
+
+def insert_synthetic_bookings(pairs, chunk_size=2000):
+    # bulk_create skips the booking signals, so callers rebuild the slot
+    # counters and daily stats afterwards.
+    inserted = 0
+    chunk = []
+    for pair in pairs:
+        chunk.append(pair)
+        if len(chunk) >= chunk_size:
+            inserted += insert_booking_chunk(chunk)
+            chunk = []
+    if chunk:
+        inserted += insert_booking_chunk(chunk)
+    return inserted
+
+
+def insert_booking_chunk(chunk):
+    bookings = Booking.objects.bulk_create([booking for booking, _ in chunk])
+    BookingItem.objects.bulk_create(
+        [
+            BookingItem(
+                booking_id=booking.pk,
+                service_id=service.pk,
+                category=service.category,
+                subcategory=service.subcategory,
+                service_name=service.name,
+                duration_minutes=service.duration_minutes,
+                price=service.price,
+            )
+            for booking, (_, booked) in zip(bookings, chunk)
+            for service in booked
+        ]
+    )
+    return len(bookings)
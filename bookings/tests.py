@@ -1,15 +1,36 @@
-from datetime import time, timedelta
+import csv
+import random
+from datetime import date, time, timedelta
 from decimal import Decimal
+from unittest import mock
 
 from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from zoneinfo import ZoneInfo
 
-from bookings.models import Booking
+from bookings.availability import (
+    LONGEST_BOOKING_KEY,
+    build_occupancy,
+    get_bookings_version,
+    get_day_versions,
+    get_longest_booking,
+    load_booking_intervals,
+    sliding_window_max,
+)
+from bookings.creation import create_booking
+from bookings.models import Booking, BookingDailyStats, BookingItem, SlotOccupancy
+from bookings.references import generate_booking_reference
+from bookings.synthetic import build_synthetic_services, insert_synthetic_bookings, iter_synthetic_bookings
 from bookings.views import get_available_start_slots, get_booking_timezone, is_booking_available
-from core.models import SiteSettings, WorkingHour
+from core.models import EmailOutbox, SiteSettings, WorkingHour
+from services.catalog import get_catalog_state
 from services.models import Service
 
 
@@ -96,6 +117,54 @@ class BookingAvailabilityTests(TestCase):
         self.assertIn("09:00", labels)
         self.assertNotIn("15:15", labels)
 
+    def test_available_slots_range_mode_summarises_each_day(self):
+        today = timezone.localdate()
+        days_until_monday = (0 - today.weekday()) % 7
+        monday = today + timedelta(days=days_until_monday or 7)
+        Booking.objects.create(
+            customer_name="Guest",
+            phone="123",
+            email="guest@example.com",
+            starts_at=timezone.make_aware(timezone.datetime.combine(monday, time(9, 0)), get_booking_timezone()),
+            total_duration_minutes=420,
+            total_price=Decimal("25.00"),
+        )
+        get_catalog_state()
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                reverse("available_slots"),
+                {"start": monday.isoformat(), "days": 7, "services": [self.service.pk], "include_slots": "1"},
+            )
+        payload = response.json()
+        self.assertEqual(len(payload["days"]), 7)
+        by_date = {day["date"]: day for day in payload["days"]}
+        self.assertTrue(by_date[monday.isoformat()]["is_fully_booked"])
+        self.assertTrue(by_date[(monday + timedelta(days=6)).isoformat()]["is_closed"])
+        tuesday = by_date[(monday + timedelta(days=1)).isoformat()]
+        self.assertEqual(tuesday["first_free"], "09:00")
+        self.assertEqual(tuesday["free_count"], len(tuesday["slots"]))
+
+    def test_available_slots_answers_not_modified_until_the_day_changes(self):
+        target_date = timezone.localdate() + timedelta(days=(0 - timezone.localdate().weekday()) % 7 or 7)
+        params = {"date": target_date.isoformat(), "services": [self.service.pk]}
+        response = self.client.get(reverse("available_slots"), params)
+        etag = response["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("available_slots"), params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Booking.objects.create(
+            customer_name="Guest",
+            phone="123",
+            email="guest@example.com",
+            starts_at=timezone.make_aware(timezone.datetime.combine(target_date, time(9, 0)), get_booking_timezone()),
+            total_duration_minutes=30,
+            total_price=Decimal("25.00"),
+        )
+        response = self.client.get(reverse("available_slots"), params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
     def test_booking_rejects_past_date_in_germany_timezone(self):
         germany_today = timezone.now().astimezone(ZoneInfo("Europe/Berlin")).date()
         response = self.client.post(
@@ -180,7 +249,569 @@ class BookingAvailabilityTests(TestCase):
             total_price=Decimal("35.00"),
         )
         self.client.force_login(user)
-        response = self.client.get(reverse("admin_calendar"))
+        booking_date = booking.starts_at.astimezone(get_booking_timezone()).date()
+        week_start = booking_date - timedelta(days=booking_date.weekday())
+        response = self.client.get(reverse("admin_calendar"), {"week_start": week_start.isoformat()})
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, reverse("admin:bookings_booking_change", args=[booking.pk]))
         self.assertContains(response, reverse("admin:bookings_booking_delete", args=[booking.pk]))
+
+    def test_admin_calendar_week_is_bounded_in_salon_time(self):
+        user = get_user_model().objects.create_user("calendar", password="pass", is_staff=True)
+        tz = get_booking_timezone()
+        week_start = timezone.localdate() + timedelta(days=7 - timezone.localdate().weekday())
+        late_sunday = timezone.make_aware(timezone.datetime.combine(week_start + timedelta(days=6), time(23, 30)), tz)
+        next_monday = timezone.make_aware(timezone.datetime.combine(week_start + timedelta(days=7), time(0, 0)), tz)
+        inside, outside = [
+            Booking.objects.create(
+                customer_name=name,
+                phone="123",
+                email="calendar@example.com",
+                starts_at=starts_at,
+                total_duration_minutes=30,
+                total_price=Decimal("35.00"),
+            )
+            for name, starts_at in (("Late Guest", late_sunday), ("Next Week Guest", next_monday))
+        ]
+        self.client.force_login(user)
+        response = self.client.get(reverse("admin_calendar"), {"week_start": week_start.isoformat()})
+        self.assertEqual([row["id"] for row in response.context["calendar_bookings"][week_start + timedelta(days=6)]], [inside.pk])
+        self.assertNotContains(response, outside.customer_name)
+
+    def test_calendar_feed_returns_compact_rows_for_a_month(self):
+        user = get_user_model().objects.create_user("calendar", password="pass", is_staff=True)
+        tz = get_booking_timezone()
+        month_start = (timezone.localdate().replace(day=1) + timedelta(days=32)).replace(day=1)
+        for day in (month_start, month_start + timedelta(days=20)):
+            booking = Booking.objects.create(
+                customer_name="Feed Guest",
+                phone="123",
+                email="feed@example.com",
+                starts_at=timezone.make_aware(timezone.datetime.combine(day, time(10, 0)), tz),
+                total_duration_minutes=60,
+                total_price=Decimal("35.00"),
+            )
+            BookingItem.objects.create(
+                booking=booking,
+                service=self.service,
+                service_name="Gel",
+                category="Nails",
+                duration_minutes=30,
+                price=Decimal("20.00"),
+            )
+            BookingItem.objects.create(
+                booking=booking,
+                service=self.service,
+                service_name="Art",
+                category="Nails",
+                duration_minutes=30,
+                price=Decimal("15.00"),
+            )
+        self.client.force_login(user)
+        self.client.get(reverse("admin_calendar_feed"))
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("admin_calendar_feed"), {"view": "month", "start": month_start.isoformat()})
+        payload = response.json()
+        self.assertEqual(payload["start"], month_start.isoformat())
+        self.assertEqual(len(payload["bookings"]), 2)
+        self.assertEqual(payload["bookings"][0]["services"], "Gel, Art")
+        self.assertEqual(payload["bookings"][0]["start"], "10:00")
+        self.assertEqual(payload["bookings"][0]["end"], "11:00")
+        week = self.client.get(reverse("admin_calendar_feed"), {"start": (month_start + timedelta(days=20)).isoformat()}).json()
+        self.assertEqual(len(week["days"]), 7)
+        self.assertEqual(len(week["bookings"]), 1)
+
+    def test_bookings_export_streams_one_row_per_item(self):
+        user = get_user_model().objects.create_user("export", password="pass", is_staff=True)
+        tz = get_booking_timezone()
+        day = date(2030, 3, 4)
+        with_items = Booking.objects.create(
+            customer_name="Export Guest",
+            phone="123",
+            email="export@example.com",
+            starts_at=timezone.make_aware(timezone.datetime.combine(day, time(23, 30)), tz),
+            total_duration_minutes=60,
+            total_price=Decimal("35.50"),
+        )
+        for name, price in (("Gel", Decimal("20.00")), ("Art", Decimal("15.50"))):
+            BookingItem.objects.create(
+                booking=with_items,
+                service=self.service,
+                service_name=name,
+                category="Nails",
+                duration_minutes=30,
+                price=price,
+            )
+        Booking.objects.create(
+            customer_name="No Items",
+            phone="123",
+            email="none@example.com",
+            starts_at=timezone.make_aware(timezone.datetime.combine(day + timedelta(days=1), time(10, 0)), tz),
+        )
+        Booking.objects.create(
+            customer_name="Outside",
+            phone="123",
+            email="outside@example.com",
+            starts_at=timezone.make_aware(timezone.datetime.combine(day + timedelta(days=2), time(0, 0)), tz),
+        )
+        self.assertEqual(self.client.get(reverse("admin_bookings_export")).status_code, 302)
+        self.client.force_login(user)
+        params = {"start": day.isoformat(), "end": (day + timedelta(days=1)).isoformat()}
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("admin_bookings_export"), params)
+            content = b"".join(response.streaming_content).decode("utf-8")
+        self.assertIn("bookings-2030-03-04-2030-03-05.csv", response["Content-Disposition"])
+        self.assertTrue(content.startswith("\ufeffreference;date;start"))
+        rows = [line.split(";") for line in content.splitlines()[1:]]
+        self.assertEqual([(row[1], row[2], row[11], row[15]) for row in rows], [
+            ("2030-03-04", "23:30", "Gel", "20,00"),
+            ("2030-03-04", "23:30", "Art", "15,50"),
+            ("2030-03-05", "10:00", "", ""),
+        ])
+        plain = b"".join(self.client.get(reverse("admin_bookings_export"), {**params, "format": "csv"}).streaming_content).decode("utf-8")
+        self.assertTrue(plain.startswith("reference,date,start"))
+        self.assertIn(",35.50,Gel,", plain)
+
+    def test_bookings_export_escapes_formulas(self):
+        user = get_user_model().objects.create_user("export", password="pass", is_staff=True)
+        day = date(2030, 3, 4)
+        Booking.objects.create(
+            customer_name='=HYPERLINK("http://example.com")',
+            phone="+cmd|' /C calc'!A0",
+            email="@SUM(1)",
+            note="-2+3",
+            starts_at=timezone.make_aware(timezone.datetime.combine(day, time(10, 0)), get_booking_timezone()),
+        )
+        self.client.force_login(user)
+        response = self.client.get(reverse("admin_bookings_export"), {"start": day.isoformat(), "end": day.isoformat(), "format": "csv"})
+        [row] = list(csv.reader(b"".join(response.streaming_content).decode("utf-8").splitlines()))[1:]
+        self.assertEqual(row[5:9], ['\'=HYPERLINK("http://example.com")', "'+cmd|' /C calc'!A0", "'@SUM(1)", "'-2+3"])
+
+
+class AvailabilityEngineTests(TestCase):
+    def test_build_occupancy_counts_every_touched_slot(self):
+        grid_start = timezone.make_aware(timezone.datetime(2030, 1, 7, 9, 0), ZoneInfo("Europe/Berlin"))
+        intervals = [
+            (grid_start + timedelta(minutes=15), grid_start + timedelta(minutes=45)),
+            (grid_start + timedelta(minutes=30), grid_start + timedelta(minutes=40)),
+            (grid_start - timedelta(minutes=30), grid_start + timedelta(minutes=5)),
+        ]
+        self.assertEqual(build_occupancy(grid_start, 15, 4, intervals), [1, 1, 2, 0])
+
+    def test_sliding_window_max_returns_peak_per_window(self):
+        self.assertEqual(sliding_window_max([0, 2, 1, 0, 3, 1], 3), [2, 2, 3, 3])
+        self.assertEqual(sliding_window_max([1, 0], 1), [1, 0])
+
+    def test_day_slots_use_single_booking_query(self):
+        SiteSettings.objects.create(site_name="LK", concurrent_capacity=1, booking_slot_minutes=15)
+        target_date = timezone.localdate() + timedelta(days=1)
+        WorkingHour.objects.create(weekday=target_date.weekday(), is_open=True, open_time=time(9, 0), close_time=time(12, 0))
+        starts_at = timezone.make_aware(timezone.datetime.combine(target_date, time(10, 0)), get_booking_timezone())
+        Booking.objects.create(
+            customer_name="Guest",
+            phone="123",
+            email="guest@example.com",
+            starts_at=starts_at,
+            total_duration_minutes=60,
+            total_price=Decimal("25.00"),
+        )
+        with self.assertNumQueries(1):
+            slots = get_available_start_slots(target_date, 30)
+        labels = [timezone.localtime(slot).strftime("%H:%M") for slot in slots]
+        self.assertEqual(labels, ["09:00", "09:15", "09:30", "11:00", "11:15", "11:30"])
+
+    def test_booking_intervals_are_bounded_by_the_longest_booking(self):
+        SiteSettings.objects.create(site_name="LK")
+        starts_at = timezone.make_aware(timezone.datetime(2030, 1, 7, 9, 0), get_booking_timezone())
+        self.assertEqual(load_booking_intervals(starts_at, starts_at + timedelta(hours=1)), [])
+        for offset, minutes, status in ((0, 180, Booking.Status.CONFIRMED), (-120, 240, Booking.Status.CANCELLED), (-300, 60, Booking.Status.CONFIRMED)):
+            Booking.objects.create(
+                customer_name="Guest",
+                phone="123",
+                email="guest@example.com",
+                status=status,
+                starts_at=starts_at + timedelta(minutes=offset),
+                total_duration_minutes=minutes,
+            )
+        self.assertEqual(get_longest_booking(), timedelta(minutes=180))
+        self.assertEqual(cache.get(LONGEST_BOOKING_KEY), (get_bookings_version(), timedelta(minutes=180)))
+        window_start = starts_at + timedelta(minutes=170)
+        self.assertEqual(
+            load_booking_intervals(window_start, window_start + timedelta(minutes=30)),
+            [(starts_at, starts_at + timedelta(minutes=180))],
+        )
+
+
+class BookingDailyStatsTests(TestCase):
+    def setUp(self):
+        SiteSettings.objects.create(site_name="LK")
+        self.tz = get_booking_timezone()
+        self.day = timezone.localdate() + timedelta(days=3)
+
+    def create_booking(self, hour, price="30.00", **kwargs):
+        return Booking.objects.create(
+            customer_name="Guest",
+            phone="123",
+            email="guest@example.com",
+            starts_at=timezone.make_aware(timezone.datetime.combine(self.day, time(hour, 0)), self.tz),
+            total_duration_minutes=60,
+            total_price=Decimal(price),
+            **kwargs,
+        )
+
+    def get_stats(self, day=None):
+        return BookingDailyStats.objects.filter(date=day or self.day).values(
+            "confirmed_count", "pending_count", "cancelled_count", "revenue", "booked_minutes"
+        ).first()
+
+    def test_stats_follow_booking_lifecycle(self):
+        first = self.create_booking(9)
+        second = self.create_booking(11, price="45.00", status=Booking.Status.PENDING)
+        self.assertEqual(
+            self.get_stats(),
+            {"confirmed_count": 1, "pending_count": 1, "cancelled_count": 0, "revenue": Decimal("75.00"), "booked_minutes": 120},
+        )
+
+        second.status = Booking.Status.CANCELLED
+        second.save()
+        first.starts_at += timedelta(days=1)
+        first.save()
+        self.assertEqual(
+            self.get_stats(),
+            {"confirmed_count": 0, "pending_count": 0, "cancelled_count": 1, "revenue": Decimal("0.00"), "booked_minutes": 0},
+        )
+        self.assertEqual(self.get_stats(self.day + timedelta(days=1))["revenue"], Decimal("30.00"))
+
+        Booking.objects.filter(pk=second.pk).update(status=Booking.Status.CONFIRMED)
+        self.assertEqual(self.get_stats()["confirmed_count"], 1)
+        second.delete()
+        self.assertEqual(self.get_stats()["confirmed_count"], 0)
+
+    def test_dashboard_reads_totals_from_rollup(self):
+        self.create_booking(9)
+        self.create_booking(11, status=Booking.Status.CANCELLED)
+        expected = {"confirmed": 1, "pending": 0, "cancelled": 1}
+        BookingDailyStats.objects.all().delete()
+        call_command("rebuild_booking_stats", stdout=mock.Mock())
+        user = get_user_model().objects.create_user("dashboard", password="pass", is_staff=True)
+        self.client.force_login(user)
+        response = self.client.get(reverse("admin_dashboard"))
+        self.assertEqual(response.context["booking_status_counts"], expected)
+        self.assertEqual(response.context["period_totals"]["year"], 1 if self.day.year == timezone.localdate().year else 0)
+
+
+class CalendarSubscriptionTests(TestCase):
+    def setUp(self):
+        SiteSettings.objects.create(site_name="LK", domain="lk.example", calendar_feed_token="secret-token")
+        self.service = Service.objects.create(
+            name="Gel",
+            category="Nails",
+            subcategory="-",
+            price=Decimal("25.00"),
+            duration_minutes=60,
+            is_active=True,
+        )
+        self.day = timezone.localdate() + timedelta(days=2)
+        self.booking = self.create_booking("Feed, Guest", time(10, 0))
+        BookingItem.objects.create(
+            booking=self.booking,
+            service=self.service,
+            service_name="Gel",
+            category="Nails",
+            duration_minutes=60,
+            price=Decimal("25.00"),
+        )
+        self.create_booking("Cancelled Guest", time(12, 0), status=Booking.Status.CANCELLED)
+        self.create_booking("Far Guest", time(10, 0), days=200)
+
+    def create_booking(self, name, start, days=0, **kwargs):
+        return Booking.objects.create(
+            customer_name=name,
+            phone="123",
+            email="feed@example.com",
+            starts_at=timezone.make_aware(
+                timezone.datetime.combine(self.day + timedelta(days=days), start), get_booking_timezone()
+            ),
+            total_duration_minutes=60,
+            total_price=Decimal("25.00"),
+            **kwargs,
+        )
+
+    def get_feed(self, headers=None, **params):
+        return self.client.get(reverse("admin_calendar_ics"), {"token": "secret-token", **params}, headers=headers)
+
+    def test_feed_requires_the_configured_token(self):
+        self.assertEqual(self.client.get(reverse("admin_calendar_ics"), {"token": "wrong"}).status_code, 403)
+        site_settings = SiteSettings.objects.get()
+        site_settings.calendar_feed_token = ""
+        site_settings.save()
+        self.assertEqual(self.client.get(reverse("admin_calendar_ics"), {"token": ""}).status_code, 403)
+
+    def test_feed_lists_upcoming_active_bookings(self):
+        response = self.get_feed()
+        content = response.content.decode()
+        self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+        self.assertTrue(content.startswith("BEGIN:VCALENDAR\r\n"))
+        self.assertEqual(content.count("BEGIN:VEVENT"), 1)
+        self.assertIn(f"UID:{self.booking.reference}@lk.example", content)
+        self.assertIn("SUMMARY:Feed\\, Guest – Gel", content)
+        self.assertNotIn("Cancelled Guest", content)
+        self.assertTrue(all(len(line.encode()) <= 75 for line in content.split("\r\n")))
+
+        streamed = self.get_feed(days=365)
+        self.assertTrue(streamed.streaming)
+        self.assertEqual(b"".join(streamed.streaming_content).decode().count("BEGIN:VEVENT"), 2)
+
+    async def test_long_feed_streams_asynchronously_under_asgi(self):
+        response = await self.async_client.get(reverse("admin_calendar_ics"), {"token": "secret-token", "days": 365})
+        self.assertTrue(response.is_async)
+        content = b"".join([part async for part in response.streaming_content]).decode()
+        self.assertEqual(content.count("BEGIN:VEVENT"), 2)
+        self.assertTrue(content.endswith("END:VCALENDAR\r\n"))
+
+    def test_repeated_polls_are_served_from_cache_until_bookings_change(self):
+        first = self.get_feed()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_feed().content, first.content)
+            not_modified = self.get_feed(headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(not_modified.status_code, 304)
+
+        self.booking.status = Booking.Status.CANCELLED
+        self.booking.save()
+        changed = self.get_feed(headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotIn("BEGIN:VEVENT", changed.content.decode())
+
+
+class SyntheticDataTests(TestCase):
+    def test_generated_bookings_are_inserted_in_chunks_with_their_items(self):
+        rng = random.Random(3)
+        Service.objects.bulk_create(build_synthetic_services(6, rng))
+        services = list(Service.objects.all())
+        tz = ZoneInfo("Europe/Berlin")
+        start_date = date(2030, 1, 1)
+        pairs = iter_synthetic_bookings(25, services, start_date, 10, tz, rng)
+        with self.assertNumQueries(6):
+            self.assertEqual(insert_synthetic_bookings(pairs, chunk_size=10), 25)
+        self.assertEqual(len({service.slug for service in services}), 6)
+        for booking in Booking.objects.prefetch_related("items"):
+            items = list(booking.items.all())
+            self.assertTrue(1 <= len(items) <= 3)
+            self.assertEqual(booking.total_price, sum(item.price for item in items))
+            self.assertEqual(booking.ends_at - booking.starts_at, timedelta(minutes=booking.total_duration_minutes))
+            local_start = booking.starts_at.astimezone(tz)
+            self.assertTrue(start_date <= local_start.date() < start_date + timedelta(days=10))
+            self.assertTrue(time(9) <= local_start.time() < time(18))
+
+
+class OccupancyCacheTests(TestCase):
+    def setUp(self):
+        SiteSettings.objects.create(site_name="LK", concurrent_capacity=1, booking_slot_minutes=15)
+        self.target_date = timezone.localdate() + timedelta(days=1)
+        WorkingHour.objects.create(weekday=self.target_date.weekday(), is_open=True, open_time=time(9, 0), close_time=time(12, 0))
+        self.starts_at = timezone.make_aware(timezone.datetime.combine(self.target_date, time(9, 0)), get_booking_timezone())
+
+    def create_booking(self):
+        return Booking.objects.create(
+            customer_name="Guest",
+            phone="123",
+            email="guest@example.com",
+            starts_at=self.starts_at,
+            total_duration_minutes=60,
+            total_price=Decimal("25.00"),
+        )
+
+    def test_warm_lookup_skips_booking_query(self):
+        get_available_start_slots(self.target_date, 30)
+        with self.assertNumQueries(0):
+            get_available_start_slots(self.target_date, 30)
+        self.assertTrue(is_booking_available(self.starts_at, 30))
+
+    def test_booking_save_and_delete_invalidate_cached_day(self):
+        self.assertIn(self.starts_at, get_available_start_slots(self.target_date, 30))
+        booking = self.create_booking()
+        self.assertNotIn(self.starts_at, get_available_start_slots(self.target_date, 30))
+        booking.starts_at = self.starts_at + timedelta(hours=1)
+        booking.save()
+        self.assertIn(self.starts_at, get_available_start_slots(self.target_date, 30))
+        booking.delete()
+        self.assertEqual(len(get_available_start_slots(self.target_date, 30)), 11)
+
+    def test_bulk_status_update_invalidates_cached_day(self):
+        self.create_booking()
+        self.assertFalse(is_booking_available(self.starts_at, 30))
+        Booking.objects.all().update(status=Booking.Status.CANCELLED)
+        self.assertTrue(is_booking_available(self.starts_at, 30))
+
+    def test_capacity_change_applies_to_cached_day(self):
+        self.create_booking()
+        self.assertFalse(is_booking_available(self.starts_at, 30))
+        site_settings = SiteSettings.objects.get()
+        site_settings.concurrent_capacity = 2
+        site_settings.save()
+        self.assertTrue(is_booking_available(self.starts_at, 30))
+
+    def test_day_cached_before_commit_is_dropped_after_commit(self):
+        site_settings = SiteSettings.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            site_settings.booking_slot_minutes = 30
+            site_settings.save()
+            versions = get_day_versions([self.target_date])
+        self.assertNotEqual(get_day_versions([self.target_date]), versions)
+
+
+class BookingSubmissionTests(TestCase):
+    def setUp(self):
+        SiteSettings.objects.create(site_name="LK", contact_email="owner@example.com", concurrent_capacity=1)
+        self.target_date = timezone.localdate() + timedelta(days=1)
+        WorkingHour.objects.create(weekday=self.target_date.weekday(), is_open=True, open_time=time(9, 0), close_time=time(12, 0))
+        self.service = Service.objects.create(name="Test Service", category="Nails", price=Decimal("25.00"), duration_minutes=30)
+
+    def test_booking_queues_emails_instead_of_sending(self):
+        response = self.client.post(
+            reverse("booking_create"),
+            {
+                "customer_name": "Guest",
+                "phone": "123",
+                "email": "guest@example.com",
+                "appointment_date": self.target_date.isoformat(),
+                "appointment_time": "09:00",
+                "services": [self.service.pk],
+            },
+        )
+        self.assertRedirects(response, reverse("booking_success"))
+        self.assertEqual(len(mail.outbox), 0)
+        queued = dict(EmailOutbox.objects.values_list("template_type", "recipient_list"))
+        self.assertEqual(queued, {"admin_booking": "owner@example.com", "customer_confirmation": "guest@example.com"})
+
+
+class BookingReferenceTests(TestCase):
+    def test_references_in_the_same_second_are_unique_and_sortable(self):
+        now = timezone.now()
+        references = [generate_booking_reference(now) for _ in range(50)]
+        self.assertEqual(len(set(references)), 50)
+        self.assertTrue(all(reference.startswith("LK") and len(reference) == 21 for reference in references))
+        later = generate_booking_reference(now + timedelta(seconds=1))
+        self.assertGreater(later, max(references))
+
+
+class BookingCreationTests(TestCase):
+    def setUp(self):
+        SiteSettings.objects.create(site_name="LK", concurrent_capacity=2)
+        self.services = [
+            Service.objects.create(name=f"Service {index}", category="Nails", price=Decimal("10.00"), duration_minutes=15, booking_count=3)
+            for index in range(5)
+        ]
+        self.starts_at = timezone.now().replace(second=0, microsecond=0) + timedelta(days=2)
+
+    def test_booking_is_written_with_three_statements(self):
+        prices = {service.pk: service.price for service in self.services}
+        with CaptureQueriesContext(connection) as queries:
+            booking, items = create_booking(
+                self.services,
+                prices,
+                15,
+                2,
+                get_booking_timezone(),
+                customer_name="Guest",
+                phone="123",
+                email="guest@example.com",
+                starts_at=self.starts_at,
+            )
+        writes = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith(("INSERT", "UPDATE")) and not any(table in query["sql"] for table in ("slotoccupancy", "bookingdailystats"))
+        ]
+        self.assertEqual(len(writes), 3)
+        booking.refresh_from_db()
+        self.assertEqual(booking.total_price, Decimal("50.00"))
+        self.assertEqual(booking.total_duration_minutes, 75)
+        self.assertEqual(booking.ends_at, self.starts_at + timedelta(minutes=75))
+        self.assertEqual(booking.items.count(), 5)
+        self.assertEqual(set(Service.objects.values_list("booking_count", flat=True)), {4})
+
+
+class SlotOccupancyTests(TestCase):
+    def setUp(self):
+        SiteSettings.objects.create(site_name="LK", concurrent_capacity=1, booking_slot_minutes=15)
+        self.target_date = timezone.localdate() + timedelta(days=1)
+        WorkingHour.objects.create(weekday=self.target_date.weekday(), is_open=True, open_time=time(9, 0), close_time=time(12, 0))
+        self.starts_at = timezone.make_aware(timezone.datetime.combine(self.target_date, time(9, 0)), get_booking_timezone())
+        self.service = Service.objects.create(
+            name="Test Service",
+            category="Nails",
+            price=Decimal("25.00"),
+            duration_minutes=30,
+        )
+
+    def slot_counts(self):
+        return dict(SlotOccupancy.objects.filter(date=self.target_date, count__gt=0).values_list("slot_index", "count"))
+
+    def test_booking_lifecycle_maintains_slot_counts(self):
+        booking = Booking.objects.create(
+            customer_name="Guest",
+            phone="123",
+            email="guest@example.com",
+            starts_at=self.starts_at,
+            total_duration_minutes=30,
+            total_price=Decimal("25.00"),
+        )
+        self.assertEqual(self.slot_counts(), {36: 1, 37: 1})
+        booking.starts_at += timedelta(minutes=15)
+        booking.save()
+        self.assertEqual(self.slot_counts(), {37: 1, 38: 1})
+        booking.status = Booking.Status.CANCELLED
+        booking.save()
+        self.assertEqual(self.slot_counts(), {})
+        Booking.objects.filter(pk=booking.pk).update(status=Booking.Status.CONFIRMED)
+        self.assertEqual(self.slot_counts(), {37: 1, 38: 1})
+        Booking.objects.get(pk=booking.pk).delete()
+        self.assertEqual(self.slot_counts(), {})
+
+    def test_stale_and_deferred_saves_count_against_stored_schedule(self):
+        booking = Booking.objects.create(
+            customer_name="Guest",
+            phone="123",
+            email="guest@example.com",
+            starts_at=self.starts_at,
+            total_duration_minutes=30,
+            total_price=Decimal("25.00"),
+        )
+        first = Booking.objects.get(pk=booking.pk)
+        second = Booking.objects.get(pk=booking.pk)
+        first.starts_at += timedelta(minutes=15)
+        first.save()
+        second.starts_at += timedelta(minutes=30)
+        second.save()
+        self.assertEqual(self.slot_counts(), {38: 1, 39: 1})
+        deferred = Booking.objects.only("pk", "customer_name").get(pk=booking.pk)
+        deferred.customer_name = "Renamed"
+        deferred.save()
+        self.assertEqual(self.slot_counts(), {38: 1, 39: 1})
+
+    def test_concurrent_booking_for_last_seat_is_rejected(self):
+        Booking.objects.create(
+            customer_name="First",
+            phone="123",
+            email="first@example.com",
+            starts_at=self.starts_at,
+            total_duration_minutes=30,
+            total_price=Decimal("25.00"),
+        )
+        with mock.patch("bookings.views.is_booking_available", return_value=True):
+            response = self.client.post(
+                reverse("booking_create"),
+                {
+                    "customer_name": "Second",
+                    "phone": "123",
+                    "email": "second@example.com",
+                    "appointment_date": self.target_date.isoformat(),
+                    "appointment_time": "09:15",
+                    "services": [self.service.pk],
+                },
+            )
+        self.assertContains(response, "fully booked")
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertFalse(EmailOutbox.objects.exists())
+        self.assertEqual(self.slot_counts(), {36: 1, 37: 1})
@@ -1,27 +1,88 @@
 from collections import defaultdict
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from decimal import Decimal
-from zoneinfo import ZoneInfo
 
+from asgiref.sync import sync_to_async
 from django import forms
-from django.conf import settings
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
 from django.db import transaction
-from django.db.models import Q, Sum
-from django.http import HttpResponseRedirect, JsonResponse
+from django.db.models import Sum
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
 from django.shortcuts import render
 from django.template import Context, Template
 from django.urls import reverse, reverse_lazy
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
 from django.utils.dateparse import parse_date
+from django.utils.http import urlencode
 from django.utils import timezone
-from django.utils.translation import gettext_lazy as _
+from django.utils.translation import get_language, gettext_lazy as _
 from django.views.generic import FormView, TemplateView
 
-from bookings.models import Booking, BookingItem
-from core.email_utils import send_configured_email
-from core.models import SiteSettings, WorkingHour
+from bookings.availability import (
+    count_start_candidates,
+    get_bookings_version,
+    get_day_bounds,
+    get_day_versions,
+    get_day_start_slots,
+    get_range_start_slots,
+    has_free_capacity,
+    round_up_to_next_slot,
+)
+from bookings.creation import create_booking
+from bookings.exports import stream_bookings_csv
+from bookings.ics import (
+    ICS_CACHE_MAX_DAYS,
+    ICS_CACHE_TIMEOUT,
+    ICS_DEFAULT_DAYS,
+    ICS_MAX_DAYS,
+    iter_calendar,
+)
+from bookings.models import Booking, BookingDailyStats, BookingItem
+from bookings.occupancy import SlotCapacityExceeded
+from core.email_templates import render_email_template
+from core.email_utils import queue_email, send_configured_email
+from core.page_cache import build_etag, set_validators
+from core.metrics import BOOKING_FAILURES, BOOKINGS_CREATED, SLOT_LATENCY, record_cache_lookups
+from core.settings_cache import get_settings_snapshot, get_site_settings
+from core.streaming import streaming_response
+from core.timing import timed
+from services.catalog import build_catalog_snapshot, get_catalog_version, get_next_price_change
 from services.models import Service
+from services.pricing import resolve_prices
+
+
+DEFAULT_RANGE_DAYS = 31
+MAX_RANGE_DAYS = 62
+
+ADMIN_BOOKING_HTML = Template(
+    "<h2>New booking {{ booking_reference }}</h2>"
+    "<p><strong>Customer:</strong> {{ customer_name }}</p>"
+    "<p><strong>Phone:</strong> {{ phone }}</p>"
+    "<p><strong>Email:</strong> {{ email }}</p>"
+    "<p><strong>Appointment date:</strong> {{ appointment_date }}</p>"
+    "<p><strong>Appointment time:</strong> {{ appointment_time }}</p>"
+    "<p><strong>Total duration:</strong> {{ total_duration }} minutes</p>"
+    "<p><strong>Total price:</strong> {{ total_price }}</p>"
+    "<p><strong>Services:</strong></p>"
+    "<pre>{{ service_lines }}</pre>"
+    "<p><strong>Note:</strong> {{ note }}</p>"
+)
+CUSTOMER_CONFIRMATION_HTML = Template(
+    "<h2>Hello {{ customer_name }},</h2>"
+    "<p>Your booking <strong>{{ booking_reference }}</strong> has been received by {{ site_name }}.</p>"
+    "<p><strong>Appointment date:</strong> {{ appointment_date }}</p>"
+    "<p><strong>Appointment time:</strong> {{ appointment_time }}</p>"
+    "<p><strong>Total duration:</strong> {{ total_duration }} minutes</p>"
+    "<p><strong>Total price:</strong> {{ total_price }}</p>"
+    "<p><strong>Services:</strong></p>"
+    "<pre>{{ service_lines }}</pre>"
+    "<p><strong>Note:</strong> {{ note }}</p>"
+    "<p>Thank you,<br>{{ site_name }}</p>"
+)
 
 
 class BookingForm(forms.Form):
@@ -49,8 +110,10 @@ class BookingForm(forms.Form):
         appointment_date = self.cleaned_data["appointment_date"]
         germany_today = timezone.now().astimezone(get_booking_timezone()).date()
         if appointment_date < germany_today:
+            BOOKING_FAILURES.labels("past").inc()
             raise forms.ValidationError(_("Please choose today or a future date in Germany time."))
         if not get_working_hour(appointment_date):
+            BOOKING_FAILURES.labels("closed").inc()
             raise forms.ValidationError(_("The salon is closed on the selected day."))
         return appointment_date
 
@@ -59,32 +122,34 @@ class TestEmailForm(forms.Form):
     recipient = forms.EmailField()
 
 
-def get_site_settings():
-    return SiteSettings.objects.first() or SiteSettings(
-        booking_slot_minutes=15,
-        concurrent_capacity=3,
-        timezone="Europe/Berlin",
-        site_name="LK Nails & Lashes",
-        domain="lknailslashes.de",
-    )
-
-
 def get_booking_timezone():
-    return ZoneInfo(get_site_settings().timezone or settings.TIME_ZONE)
+    return get_settings_snapshot().timezone
 
 
 def get_germany_now():
     return timezone.now().astimezone(get_booking_timezone())
 
 
+def get_local_day_start(target_date):
+    return timezone.make_aware(datetime.combine(target_date, time.min), get_booking_timezone())
+
+
+def get_local_date_range(start_date, end_date):
+    # Half-open [start_date 00:00, end_date 00:00) in the salon timezone, so
+    # filters compare starts_at directly and can use its indexes.
+    return get_local_day_start(start_date), get_local_day_start(end_date)
+
+
 def combine_local_datetime(appointment_date, appointment_time):
     combined = datetime.combine(appointment_date, appointment_time)
     return timezone.make_aware(combined, get_booking_timezone())
 
 
-def calculate_totals(services):
+def calculate_totals(services, prices=None):
+    if prices is None:
+        prices = resolve_prices(services)
     total_duration = sum(service.duration_minutes for service in services)
-    total_price = sum((service.current_price for service in services), start=Decimal("0.00"))
+    total_price = sum((prices[service.pk] for service in services), start=Decimal("0.00"))
     return total_duration, total_price
 
 
@@ -94,30 +159,14 @@ def get_available_slots(target_date):
     if not working_hour:
         return []
 
-    tz = get_booking_timezone()
-    day_start = timezone.make_aware(datetime.combine(target_date, working_hour.open_time), tz)
-    day_end = timezone.make_aware(datetime.combine(target_date, working_hour.close_time), tz)
     slot_minutes = site_settings.booking_slot_minutes
-
-    slots = []
-    current = day_start
-    germany_now = get_germany_now()
-    if target_date == germany_now.date():
-        current = max(current, round_up_to_next_slot(germany_now, slot_minutes))
-    while current + timedelta(minutes=slot_minutes) <= day_end:
-        slots.append(current)
-        current += timedelta(minutes=slot_minutes)
-    return slots
-
-
-def round_up_to_next_slot(dt_value, slot_minutes):
-    dt_value = dt_value.replace(second=0, microsecond=0)
-    remainder = dt_value.minute % slot_minutes
-    if remainder or dt_value.second or dt_value.microsecond:
-        dt_value += timedelta(minutes=slot_minutes - remainder if remainder else slot_minutes)
-    return dt_value.replace(second=0, microsecond=0)
+    first_start, day_end = get_day_bounds(target_date, working_hour, slot_minutes, get_booking_timezone(), get_germany_now())
+    slot = timedelta(minutes=slot_minutes)
+    return [first_start + slot * index for index in range(count_start_candidates(first_start, day_end, slot_minutes))]
 
 
+@timed("availability")
+@SLOT_LATENCY.labels("start_slots").time()
 def get_available_start_slots(target_date, duration_minutes):
     if duration_minutes <= 0:
         return []
@@ -126,52 +175,37 @@ def get_available_start_slots(target_date, duration_minutes):
     if not working_hour:
         return []
 
-    tz = get_booking_timezone()
-    day_end = timezone.make_aware(datetime.combine(target_date, working_hour.close_time), tz)
-    valid_slots = []
-    for slot in get_available_slots(target_date):
-        if slot + timedelta(minutes=duration_minutes) > day_end:
-            continue
-        if is_booking_available(slot, duration_minutes):
-            valid_slots.append(slot)
-    return valid_slots
+    site_settings = get_site_settings()
+    return get_day_start_slots(
+        target_date,
+        duration_minutes,
+        working_hour,
+        site_settings.booking_slot_minutes,
+        site_settings.concurrent_capacity,
+        get_booking_timezone(),
+        get_germany_now(),
+    )
 
 
 def get_working_hour(target_date):
-    return WorkingHour.objects.filter(weekday=target_date.weekday(), is_open=True).first()
+    return get_settings_snapshot().open_hours.get(target_date.weekday())
+
 
+def get_working_hours_by_weekday():
+    return get_settings_snapshot().open_hours
 
+
+@timed("availability")
+@SLOT_LATENCY.labels("booking_check").time()
 def is_booking_available(starts_at, duration_minutes):
     site_settings = get_site_settings()
-    ends_at = starts_at + timedelta(minutes=duration_minutes)
-    slot_minutes = site_settings.booking_slot_minutes
-    overlapping = Booking.objects.filter(
-        ~Q(status=Booking.Status.CANCELLED),
-        starts_at__lt=ends_at,
-        ends_at__gt=starts_at,
-    ).only("starts_at", "ends_at")
-    current = starts_at
-    while current < ends_at:
-        slot_end = current + timedelta(minutes=slot_minutes)
-        slot_count = sum(1 for booking in overlapping if booking.starts_at < slot_end and booking.ends_at > current)
-        if slot_count >= site_settings.concurrent_capacity:
-            return False
-        current = slot_end
-    return True
-
-
-def render_email_template(template_type, fallback_subject, fallback_body, context):
-    email_template = SiteSettings.objects.none()
-    from core.models import EmailTemplate
-
-    email_template = EmailTemplate.objects.filter(template_type=template_type).first()
-    if not email_template:
-        return fallback_subject, fallback_body, ""
-    template_context = Context(context)
-    subject = Template(email_template.subject).render(template_context).strip()
-    body = Template(email_template.body).render(template_context).strip()
-    html_body = Template(email_template.html_body).render(template_context).strip() if email_template.html_body else ""
-    return subject or fallback_subject, body or fallback_body, html_body
+    return has_free_capacity(
+        starts_at,
+        duration_minutes,
+        site_settings.booking_slot_minutes,
+        site_settings.concurrent_capacity,
+        get_booking_timezone(),
+    )
 
 
 class BookingCreateView(FormView):
@@ -181,85 +215,81 @@ class BookingCreateView(FormView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        services = Service.objects.filter(is_active=True).order_by("category", "subcategory", "name")
-        grouped = defaultdict(lambda: defaultdict(list))
         selected_service_ids = set()
         if self.request.method == "POST":
             selected_service_ids = {int(service_id) for service_id in self.request.POST.getlist("services") if service_id.isdigit()}
-        for service in services:
-            grouped[service.category][service.subcategory].append(service)
-        context["grouped_services"] = {
-            category: dict(subcategories)
-            for category, subcategories in grouped.items()
-        }
+        context["grouped_services"] = build_catalog_snapshot().grouped
         context["site_settings"] = get_site_settings()
         context["selected_service_ids"] = selected_service_ids
         context["service_categories"] = list(context["grouped_services"].keys())
-        context["closed_weekdays"] = list(WorkingHour.objects.filter(is_open=False).values_list("weekday", flat=True))
+        context["closed_weekdays"] = get_settings_snapshot().closed_weekdays
         return context
 
     def form_valid(self, form):
         selected_services = list(form.cleaned_data["services"])
-        total_duration, total_price = calculate_totals(selected_services)
+        prices = resolve_prices(selected_services)
+        total_duration = calculate_totals(selected_services, prices)[0]
         starts_at = combine_local_datetime(
             form.cleaned_data["appointment_date"],
             form.cleaned_data["appointment_time"],
         )
 
         if not total_duration:
+            BOOKING_FAILURES.labels("no_services").inc()
             form.add_error("services", _("Please select at least one service."))
             return self.form_invalid(form)
 
         if starts_at < timezone.now():
+            BOOKING_FAILURES.labels("past").inc()
             form.add_error("appointment_date", _("Please select a future appointment time."))
             return self.form_invalid(form)
 
         working_hour = get_working_hour(starts_at.date())
         if not working_hour:
+            BOOKING_FAILURES.labels("closed").inc()
             form.add_error("appointment_date", _("The salon is closed on this day."))
             return self.form_invalid(form)
 
         closing_at = timezone.make_aware(datetime.combine(starts_at.date(), working_hour.close_time), get_booking_timezone())
         if starts_at + timedelta(minutes=total_duration) > closing_at:
+            BOOKING_FAILURES.labels("outside_hours").inc()
             form.add_error("appointment_time", _("Selected services do not fit into working hours."))
             return self.form_invalid(form)
 
         if not is_booking_available(starts_at, total_duration):
+            BOOKING_FAILURES.labels("full").inc()
             form.add_error("appointment_time", _("This time slot is fully booked. Please choose another time."))
             return self.form_invalid(form)
 
-        with transaction.atomic():
-            booking = Booking.objects.create(
-                customer_name=form.cleaned_data["customer_name"],
-                phone=form.cleaned_data["phone"],
-                email=form.cleaned_data["email"],
-                note=form.cleaned_data["note"],
-                starts_at=starts_at,
-                total_duration_minutes=total_duration,
-                total_price=total_price,
-            )
-            for service in selected_services:
-                BookingItem.objects.create(
-                    booking=booking,
-                    service=service,
-                    category=service.category,
-                    subcategory=service.subcategory,
-                    service_name=service.name,
-                    duration_minutes=service.duration_minutes,
-                    price=service.current_price,
+        site_settings = get_site_settings()
+        try:
+            with transaction.atomic():
+                booking, items = create_booking(
+                    selected_services,
+                    prices,
+                    site_settings.booking_slot_minutes,
+                    site_settings.concurrent_capacity,
+                    get_booking_timezone(),
+                    customer_name=form.cleaned_data["customer_name"],
+                    phone=form.cleaned_data["phone"],
+                    email=form.cleaned_data["email"],
+                    note=form.cleaned_data["note"],
+                    starts_at=starts_at,
                 )
-                Service.objects.filter(pk=service.pk).update(booking_count=service.booking_count + 1)
-            booking.recalculate()
-            booking.save()
-            self.send_booking_emails(booking)
+                self.queue_booking_emails(booking, items)
+        except SlotCapacityExceeded:
+            BOOKING_FAILURES.labels("full").inc()
+            form.add_error("appointment_time", _("This time slot is fully booked. Please choose another time."))
+            return self.form_invalid(form)
 
+        BOOKINGS_CREATED.inc()
         messages.success(self.request, _("Your booking was submitted successfully."))
         self.request.session["latest_booking_id"] = booking.pk
         return HttpResponseRedirect(reverse("booking_success"))
 
-    def send_booking_emails(self, booking):
+    @timed("email")
+    def queue_booking_emails(self, booking, items):
         site_settings = get_site_settings()
-        items = list(booking.items.all())
         services_text = ", ".join(item.service_name for item in items)
         service_lines = "\n".join(
             f"- {item.service_name} | {item.category}/{item.subcategory} | {item.duration_minutes} min | {item.price}"
@@ -282,19 +312,6 @@ class BookingCreateView(FormView):
             "service_lines": service_lines,
             "site_name": site_settings.site_name,
         }
-        admin_html = (
-            "<h2>New booking {{ booking_reference }}</h2>"
-            "<p><strong>Customer:</strong> {{ customer_name }}</p>"
-            "<p><strong>Phone:</strong> {{ phone }}</p>"
-            "<p><strong>Email:</strong> {{ email }}</p>"
-            "<p><strong>Appointment date:</strong> {{ appointment_date }}</p>"
-            "<p><strong>Appointment time:</strong> {{ appointment_time }}</p>"
-            "<p><strong>Total duration:</strong> {{ total_duration }} minutes</p>"
-            "<p><strong>Total price:</strong> {{ total_price }}</p>"
-            "<p><strong>Services:</strong></p>"
-            "<pre>{{ service_lines }}</pre>"
-            "<p><strong>Note:</strong> {{ note }}</p>"
-        )
         admin_subject, admin_body, admin_html_body = render_email_template(
             "admin_booking",
             f"New booking {booking.reference}",
@@ -312,25 +329,12 @@ class BookingCreateView(FormView):
             ),
             email_context,
         )
-        send_configured_email(
+        queue_email(
             admin_subject,
             admin_body,
             [admin_email],
-            site_settings=site_settings,
             template_type="admin_booking",
-            html_body=admin_html_body or Template(admin_html).render(Context(email_context)).strip(),
-        )
-        customer_html = (
-            "<h2>Hello {{ customer_name }},</h2>"
-            "<p>Your booking <strong>{{ booking_reference }}</strong> has been received by {{ site_name }}.</p>"
-            "<p><strong>Appointment date:</strong> {{ appointment_date }}</p>"
-            "<p><strong>Appointment time:</strong> {{ appointment_time }}</p>"
-            "<p><strong>Total duration:</strong> {{ total_duration }} minutes</p>"
-            "<p><strong>Total price:</strong> {{ total_price }}</p>"
-            "<p><strong>Services:</strong></p>"
-            "<pre>{{ service_lines }}</pre>"
-            "<p><strong>Note:</strong> {{ note }}</p>"
-            "<p>Thank you,<br>{{ site_name }}</p>"
+            html_body=admin_html_body or ADMIN_BOOKING_HTML.render(Context(email_context)).strip(),
         )
         customer_subject, customer_body, customer_html_body = render_email_template(
             "customer_confirmation",
@@ -348,13 +352,12 @@ class BookingCreateView(FormView):
             ),
             email_context,
         )
-        send_configured_email(
+        queue_email(
             customer_subject,
             customer_body,
             [booking.email],
-            site_settings=site_settings,
             template_type="customer_confirmation",
-            html_body=customer_html_body or Template(customer_html).render(Context(email_context)).strip(),
+            html_body=customer_html_body or CUSTOMER_CONFIRMATION_HTML.render(Context(email_context)).strip(),
         )
 
 
@@ -373,12 +376,66 @@ class BookingSuccessView(TemplateView):
         return context
 
 
-def available_slots_view(request):
+def get_range_days(request):
+    try:
+        days = int(request.GET.get("days", DEFAULT_RANGE_DAYS))
+    except ValueError:
+        days = DEFAULT_RANGE_DAYS
+    return min(max(days, 1), MAX_RANGE_DAYS)
+
+
+def get_slots_etag(request):
+    # Everything the slots response depends on: the query, the language, the
+    # settings and catalog versions, the booking version of each requested day
+    # and, when today is requested, the current slot.
+    snapshot = get_settings_snapshot()
+    now = timezone.now().astimezone(snapshot.timezone)
+    range_start = parse_date(request.GET.get("start", ""))
+    if range_start:
+        range_start = max(range_start, now.date())
+        dates = [range_start + timedelta(days=offset) for offset in range(get_range_days(request))]
+    else:
+        appointment_date = parse_date(request.GET.get("date", ""))
+        dates = [appointment_date] if appointment_date else []
+    day_versions = get_day_versions(dates)
+    return build_etag(
+        request.get_full_path(),
+        get_language(),
+        snapshot.version,
+        get_catalog_version(),
+        get_next_price_change(),
+        [day_versions[day] for day in dates],
+        round_up_to_next_slot(now, snapshot.effective_settings.booking_slot_minutes) if now.date() in dates else None,
+    )
+
+
+async def available_slots_view(request):
+    # The slot computation is CPU work plus cache and ORM calls shared with the
+    # sync booking form. The async ORM would hop to the sync thread once per
+    # query anyway, so the whole computation makes a single hop instead.
+    return await sync_to_async(get_available_slots_response)(request)
+
+
+def get_available_slots_response(request):
+    etag = get_slots_etag(request)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = build_available_slots_response(request)
+    return set_validators(response, etag)
+
+
+@timed("availability")
+@SLOT_LATENCY.labels("slots_api").time()
+def build_available_slots_response(request):
     appointment_date = parse_date(request.GET.get("date", ""))
     service_ids = request.GET.getlist("services")
     services = list(Service.objects.filter(is_active=True, pk__in=service_ids))
     total_duration, total_price = calculate_totals(services)
 
+    range_start = parse_date(request.GET.get("start", ""))
+    if range_start:
+        return available_slots_range_response(request, range_start, total_duration, total_price)
+
     if not appointment_date:
         return JsonResponse(
             {
@@ -426,20 +483,99 @@ def available_slots_view(request):
     )
 
 
+def available_slots_range_response(request, range_start, total_duration, total_price):
+    days = get_range_days(request)
+    include_slots = request.GET.get("include_slots") in {"1", "true", "yes"}
+
+    site_settings = get_site_settings()
+    tz = get_booking_timezone()
+    germany_now = timezone.now().astimezone(tz)
+    range_start = max(range_start, germany_now.date())
+    day_slots = get_range_start_slots(
+        range_start,
+        days,
+        max(total_duration, site_settings.booking_slot_minutes),
+        get_working_hours_by_weekday(),
+        site_settings.booking_slot_minutes,
+        site_settings.concurrent_capacity,
+        tz,
+        germany_now,
+    )
+
+    summaries = []
+    for day, slots in day_slots.items():
+        labels = [slot.astimezone(tz).strftime("%H:%M") for slot in slots or []]
+        summary = {
+            "date": day.isoformat(),
+            "is_closed": slots is None,
+            "is_fully_booked": slots is not None and not slots,
+            "first_free": labels[0] if labels else None,
+            "free_count": len(labels),
+        }
+        if include_slots:
+            summary["slots"] = [{"value": label, "label": label} for label in labels]
+        summaries.append(summary)
+
+    return JsonResponse(
+        {
+            "start": range_start.isoformat(),
+            "days": summaries,
+            "total_duration": total_duration,
+            "total_price": f"{total_price:.2f}",
+            "slot_minutes": site_settings.booking_slot_minutes,
+        }
+    )
+
+
+CALENDAR_VIEW_DAYS = {"day": 1, "week": 7}
+
+
+def get_calendar_rows(range_start, range_end):
+    # Compact read model: only the columns the calendar shows, plus the
+    # service names of all bookings in the range from one extra query.
+    rows = list(
+        Booking.objects.exclude(status=Booking.Status.CANCELLED)
+        .filter(starts_at__gte=range_start, starts_at__lt=range_end)
+        .order_by("starts_at")
+        .values("id", "reference", "customer_name", "status", "starts_at", "ends_at", "total_duration_minutes", "total_price")
+    )
+    services = defaultdict(list)
+    items = BookingItem.objects.filter(booking_id__in=[row["id"] for row in rows]).order_by("pk")
+    for booking_id, service_name in items.values_list("booking_id", "service_name"):
+        services[booking_id].append(service_name)
+    for row in rows:
+        row["services"] = ", ".join(services[row["id"]])
+    return rows
+
+
+def get_calendar_range(request):
+    local_today = get_germany_now().date()
+    view = request.GET.get("view", "week")
+    start = parse_date(request.GET.get("start", "") or request.GET.get("week_start", "")) or local_today
+    if view == "month":
+        start = start.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+    else:
+        days = CALENDAR_VIEW_DAYS.get(view, 7)
+        if days == 7:
+            start -= timedelta(days=start.weekday())
+        end = start + timedelta(days=days)
+    requested_end = parse_date(request.GET.get("end", ""))
+    if requested_end and requested_end > start:
+        end = min(requested_end, start + timedelta(days=MAX_RANGE_DAYS))
+    return start, end
+
+
 @staff_member_required
 def calendar_view(request):
     requested_start = parse_date(request.GET.get("week_start", ""))
-    local_today = timezone.localdate()
+    local_today = get_germany_now().date()
     week_start = requested_start or (local_today - timedelta(days=local_today.weekday()))
     week_days = [week_start + timedelta(days=index) for index in range(7)]
-    bookings = (
-        Booking.objects.exclude(status=Booking.Status.CANCELLED)
-        .filter(starts_at__date__gte=week_start, starts_at__date__lte=week_start + timedelta(days=6))
-        .order_by("starts_at")
-    )
+    tz = get_booking_timezone()
     grouped = {day: [] for day in week_days}
-    for booking in bookings:
-        grouped[timezone.localtime(booking.starts_at).date()].append(booking)
+    for row in get_calendar_rows(*get_local_date_range(week_start, week_start + timedelta(days=7))):
+        grouped[row["starts_at"].astimezone(tz).date()].append(row)
 
     return render(
         request,
@@ -449,24 +585,115 @@ def calendar_view(request):
             "calendar_bookings": grouped,
             "previous_week": week_start - timedelta(days=7),
             "next_week": week_start + timedelta(days=7),
+            "ics_feed_url": get_ics_feed_url(request),
         },
     )
 
 
+@staff_member_required
+def calendar_feed_view(request):
+    start, end = get_calendar_range(request)
+    tz = get_booking_timezone()
+    statuses = dict(Booking.Status.choices)
+    bookings = [
+        {
+            "id": row["id"],
+            "reference": row["reference"],
+            "customer": row["customer_name"],
+            "date": row["starts_at"].astimezone(tz).date().isoformat(),
+            "start": row["starts_at"].astimezone(tz).strftime("%H:%M"),
+            "end": row["ends_at"].astimezone(tz).strftime("%H:%M") if row["ends_at"] else None,
+            "minutes": row["total_duration_minutes"],
+            "price": f"{row['total_price']:.2f}",
+            "status": row["status"],
+            "status_label": str(statuses.get(row["status"], row["status"])),
+            "services": row["services"],
+        }
+        for row in get_calendar_rows(*get_local_date_range(start, end))
+    ]
+    return JsonResponse(
+        {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "days": [(start + timedelta(days=offset)).isoformat() for offset in range((end - start).days)],
+            "bookings": bookings,
+        }
+    )
+
+
+def get_ics_feed_url(request):
+    token = get_site_settings().calendar_feed_token
+    if not token:
+        return ""
+    return request.build_absolute_uri(f"{reverse('admin_calendar_ics')}?{urlencode({'token': token})}")
+
+
+def calendar_ics_view(request):
+    # Calendar clients cannot log in, so the feed is protected by the token
+    # from Site Settings instead of the staff session.
+    token = get_site_settings().calendar_feed_token
+    if not token or not constant_time_compare(request.GET.get("token", ""), token):
+        raise PermissionDenied
+    try:
+        days = min(max(int(request.GET.get("days", ICS_DEFAULT_DAYS)), 1), ICS_MAX_DAYS)
+    except ValueError:
+        days = ICS_DEFAULT_DAYS
+    local_today = get_germany_now().date()
+    etag = build_etag(get_bookings_version(), get_settings_snapshot().version, local_today, days)
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        return set_validators(response, etag)
+
+    range_start, range_end = get_local_date_range(local_today, local_today + timedelta(days=days))
+    content_type = "text/calendar; charset=utf-8"
+    if days > ICS_CACHE_MAX_DAYS:
+        response = streaming_response(request, iter_calendar(range_start, range_end, get_site_settings()), content_type=content_type)
+    else:
+        cache_key = "bookings:ics:" + etag.strip('"')
+        content = cache.get(cache_key)
+        record_cache_lookups("ics", content is not None, content is None)
+        if content is None:
+            content = "".join(iter_calendar(range_start, range_end, get_site_settings()))
+            cache.set(cache_key, content, ICS_CACHE_TIMEOUT)
+        response = HttpResponse(content, content_type=content_type)
+    response["Content-Disposition"] = 'inline; filename="bookings.ics"'
+    return set_validators(response, etag)
+
+
+@staff_member_required
+def bookings_export_view(request):
+    today = get_germany_now().date()
+    start_date = parse_date(request.GET.get("start", "")) or today.replace(day=1)
+    end_date = parse_date(request.GET.get("end", "")) or today
+    if end_date < start_date:
+        start_date, end_date = end_date, start_date
+    response = streaming_response(
+        request,
+        stream_bookings_csv(start_date, end_date, get_booking_timezone(), excel=request.GET.get("format") != "csv"),
+        content_type="text/csv; charset=utf-8",
+    )
+    response["Content-Disposition"] = f'attachment; filename="bookings-{start_date.isoformat()}-{end_date.isoformat()}.csv"'
+    return response
+
+
 @staff_member_required
 def dashboard_view(request):
-    now = timezone.localtime()
+    now = get_germany_now()
     today = now.date()
+    today_start, tomorrow_start = get_local_date_range(today, today + timedelta(days=1))
     this_week_start = today - timedelta(days=today.weekday())
     this_month_start = today.replace(day=1)
     this_year_start = today.replace(month=1, day=1)
 
     bookings = Booking.objects.exclude(status=Booking.Status.CANCELLED)
-    today_bookings = bookings.filter(starts_at__date=today).select_related()
+    today_bookings = bookings.filter(starts_at__gte=today_start, starts_at__lt=tomorrow_start).select_related()
     top_services = Service.objects.filter(is_active=True).order_by("-booking_count", "name")[:5]
-    monthly_revenue = bookings.filter(starts_at__date__gte=this_month_start).aggregate(total=Sum("total_price"))["total"] or Decimal("0.00")
-    weekly_revenue = bookings.filter(starts_at__date__gte=this_week_start).aggregate(total=Sum("total_price"))["total"] or Decimal("0.00")
-    today_revenue = today_bookings.aggregate(total=Sum("total_price"))["total"] or Decimal("0.00")
+    status_totals = BookingDailyStats.objects.aggregate(
+        confirmed=Sum("confirmed_count", default=0),
+        pending=Sum("pending_count", default=0),
+        cancelled=Sum("cancelled_count", default=0),
+    )
+    period_stats = list(BookingDailyStats.objects.filter(date__gte=min(this_week_start, this_year_start)))
     capacity = max(get_site_settings().concurrent_capacity, 1)
     active_now = bookings.filter(starts_at__lte=now, ends_at__gte=now).count()
 
@@ -492,20 +719,16 @@ def dashboard_view(request):
 
     context = {
         "today_bookings": today_bookings,
-        "booking_status_counts": {
-            "confirmed": bookings.filter(status=Booking.Status.CONFIRMED).count(),
-            "pending": bookings.filter(status=Booking.Status.PENDING).count(),
-            "cancelled": Booking.objects.filter(status=Booking.Status.CANCELLED).count(),
-        },
+        "booking_status_counts": status_totals,
         "period_totals": {
-            "week": bookings.filter(starts_at__date__gte=this_week_start).count(),
-            "month": bookings.filter(starts_at__date__gte=this_month_start).count(),
-            "year": bookings.filter(starts_at__date__gte=this_year_start).count(),
+            "week": sum(day.active_count for day in period_stats if day.date >= this_week_start),
+            "month": sum(day.active_count for day in period_stats if day.date >= this_month_start),
+            "year": sum(day.active_count for day in period_stats if day.date >= this_year_start),
         },
         "revenue_totals": {
-            "today": today_revenue,
-            "week": weekly_revenue,
-            "month": monthly_revenue,
+            "today": sum((day.revenue for day in period_stats if day.date == today), Decimal("0.00")),
+            "week": sum((day.revenue for day in period_stats if day.date >= this_week_start), Decimal("0.00")),
+            "month": sum((day.revenue for day in period_stats if day.date >= this_month_start), Decimal("0.00")),
         },
         "live_capacity": {
             "active_now": active_now,
@@ -515,6 +738,8 @@ def dashboard_view(request):
         "top_services": top_services,
         "service_stats": Service.objects.filter(is_active=True).order_by("-booking_count", "name")[:10],
         "test_email_form": test_email_form,
+        "export_start": this_year_start,
+        "export_end": today,
         "smtp_ready": get_site_settings().smtp_is_configured,
     }
     return render(request, "admin/dashboard.html", context)
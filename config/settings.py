@@ -32,6 +32,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",
+    "core.middleware.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
@@ -46,7 +48,7 @@ ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "core.template_backends.TimedDjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -69,6 +71,18 @@ DATABASES = {
     }
 }
 
+# Version tokens for settings, catalog and availability live in the cache, so
+# outside DEBUG it has to be shared by all Gunicorn workers and the outbox worker.
+DEFAULT_CACHE_BACKEND = (
+    "django.core.cache.backends.locmem.LocMemCache" if DEBUG else "django.core.cache.backends.filebased.FileBasedCache"
+)
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("DJANGO_CACHE_BACKEND", DEFAULT_CACHE_BACKEND),
+        "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", "lknails" if DEBUG else str(BASE_DIR / "cache")),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = []
 
 LANGUAGE_CODE = "en"
@@ -104,3 +118,17 @@ SECURE_HSTS_PRELOAD = env_bool("DJANGO_SECURE_HSTS_PRELOAD", False)
 SECURE_CONTENT_TYPE_NOSNIFF = env_bool("DJANGO_SECURE_CONTENT_TYPE_NOSNIFF", True)
 SECURE_REFERRER_POLICY = os.getenv("DJANGO_SECURE_REFERRER_POLICY", "same-origin")
 X_FRAME_OPTIONS = os.getenv("DJANGO_X_FRAME_OPTIONS", "DENY")
+
+SERVER_TIMING = env_bool("DJANGO_SERVER_TIMING", False)
+METRICS = env_bool("DJANGO_METRICS", False)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "lknails.requests": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
@@ -4,19 +4,33 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
-from bookings.views import BookingCreateView, BookingSuccessView, available_slots_view, calendar_view, dashboard_view
+from bookings.views import (
+    BookingCreateView,
+    BookingSuccessView,
+    available_slots_view,
+    bookings_export_view,
+    calendar_feed_view,
+    calendar_ics_view,
+    calendar_view,
+    dashboard_view,
+)
 from core.views import HomeView
-from core.seo_views import health_check, robots_txt, sitemap_xml
-from services.views import GalleryView, ServiceListView
+from core.seo_views import health_check, metrics_view, robots_txt, sitemap_xml
+from services.views import GalleryView, ServiceListView, service_catalog_view
 
 urlpatterns = [
     path("i18n/", include("django.conf.urls.i18n")),
     path("robots.txt", robots_txt, name="robots_txt"),
     path("sitemap.xml", sitemap_xml, name="sitemap_xml"),
     path("health/", health_check, name="health_check"),
+    path("metrics", metrics_view, name="metrics"),
     path("api/available-slots/", available_slots_view, name="available_slots"),
+    path("api/services/", service_catalog_view, name="service_catalog"),
     path("admin/dashboard/", dashboard_view),
     path("admin/calendar/", calendar_view),
+    path("admin/calendar/feed/", calendar_feed_view, name="admin_calendar_feed"),
+    path("admin/calendar/bookings.ics", calendar_ics_view, name="admin_calendar_ics"),
+    path("admin/export/bookings.csv", bookings_export_view, name="admin_bookings_export"),
 ]
 
 urlpatterns += i18n_patterns(
@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django import forms
+from django.utils import timezone
 
-from core.models import EmailLog, EmailTemplate, SiteSettings, WorkingHour
+from core.models import EmailLog, EmailOutbox, EmailTemplate, SiteSettings, WorkingHour
 
 
 class SiteSettingsAdminForm(forms.ModelForm):
@@ -44,7 +45,7 @@ class SiteSettingsAdmin(admin.ModelAdmin):
                 )
             },
         ),
-        ("Booking", {"fields": ("booking_slot_minutes", "concurrent_capacity")}),
+        ("Booking", {"fields": ("booking_slot_minutes", "concurrent_capacity", "calendar_feed_token")}),
     )
 
 
@@ -66,3 +67,20 @@ class EmailLogAdmin(admin.ModelAdmin):
     list_filter = ("status", "template_type", "created_at")
     search_fields = ("subject", "recipient_list", "error_message")
     readonly_fields = ("created_at",)
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "status", "subject", "recipient_list", "attempts", "next_attempt_at")
+    list_filter = ("status", "template_type", "created_at")
+    search_fields = ("subject", "recipient_list", "last_error")
+    readonly_fields = ("created_at", "sent_at")
+    actions = ("retry_now",)
+
+    @admin.action(description="Retry selected emails now")
+    def retry_now(self, request, queryset):
+        queryset.exclude(status=EmailOutbox.Status.SENT).update(
+            status=EmailOutbox.Status.PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+        )
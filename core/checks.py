@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    # Settings, catalog and availability versions are only seen by the other
+    # Gunicorn workers and the outbox worker through a shared cache.
+    backend = settings.CACHES["default"]["BACKEND"]
+    if settings.DEBUG or not backend.endswith("LocMemCache"):
+        return []
+    return [
+        Warning(
+            "The default cache is local to each process.",
+            hint="Point DJANGO_CACHE_BACKEND at a shared backend such as FileBasedCache, otherwise workers keep serving stale settings, pages and free slots.",
+            id="core.W001",
+        )
+    ]
@@ -1,8 +1,8 @@
-from core.models import SiteSettings
+from core.settings_cache import get_settings_snapshot
 
 
 def site_context(_request):
-    settings = SiteSettings.objects.first()
+    settings = get_settings_snapshot().site_settings
     domain = settings.domain if settings and settings.domain else "lknailslashes.de"
     return {
         "global_site_settings": settings,
@@ -0,0 +1,63 @@
+import hashlib
+
+from django.template import Context, Template
+
+from core.models import EmailTemplate
+from core.versioning import bump_version, get_version
+
+EMAIL_TEMPLATES_VERSION_KEY = "email-templates:version"
+
+_templates = None
+_compiled = {}
+
+
+def get_email_templates_version():
+    return get_version(EMAIL_TEMPLATES_VERSION_KEY)
+
+
+def clear_email_templates():
+    global _templates
+    _templates = None
+
+
+def bump_email_templates_version():
+    bump_version(EMAIL_TEMPLATES_VERSION_KEY, clear_email_templates)
+
+
+def compile_template(source, compiled):
+    # Compiled templates are keyed by a hash of their source, so a reload
+    # after an unrelated edit does not recompile anything that stayed the same.
+    key = hashlib.sha1(source.encode()).hexdigest()
+    if key not in compiled:
+        compiled[key] = _compiled.get(key) or Template(source)
+    return compiled[key]
+
+
+def get_compiled_email_templates():
+    global _templates, _compiled
+    version = get_email_templates_version()
+    if _templates is None or _templates[0] != version:
+        compiled = {}
+        templates = {
+            email_template.template_type: (
+                compile_template(email_template.subject, compiled),
+                compile_template(email_template.body, compiled),
+                compile_template(email_template.html_body, compiled) if email_template.html_body else None,
+            )
+            for email_template in EmailTemplate.objects.all()
+        }
+        _compiled = compiled
+        _templates = (version, templates)
+    return _templates[1]
+
+
+def render_email_template(template_type, fallback_subject, fallback_body, context):
+    templates = get_compiled_email_templates().get(template_type)
+    if not templates:
+        return fallback_subject, fallback_body, ""
+    subject_template, body_template, html_template = templates
+    template_context = Context(context)
+    subject = subject_template.render(template_context).strip()
+    body = body_template.render(template_context).strip()
+    html_body = html_template.render(template_context).strip() if html_template else ""
+    return subject or fallback_subject, body or fallback_body, html_body
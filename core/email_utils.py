@@ -1,11 +1,27 @@
+import smtplib
+import threading
+from datetime import timedelta
+
 from django.conf import settings
 from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import F
+from django.utils import timezone
+
+from core.metrics import EMAIL_FAILURES, EMAIL_SEND_LATENCY
+from core.models import EmailLog, EmailOutbox
+from core.settings_cache import get_settings_snapshot
+from core.timing import timed
+
+OUTBOX_MAX_ATTEMPTS = 6
+OUTBOX_RETRY_BASE_SECONDS = 60
+OUTBOX_RETRY_MAX_SECONDS = 60 * 60
+OUTBOX_LEASE_SECONDS = 5 * 60
 
-from core.models import EmailLog, SiteSettings
+_shared = threading.local()
 
 
 def build_email_connection(site_settings=None):
-    site_settings = site_settings or SiteSettings.objects.first()
+    site_settings = site_settings or get_settings_snapshot().site_settings
     if site_settings and site_settings.smtp_is_configured:
         return get_connection(
             backend="django.core.mail.backends.smtp.EmailBackend",
@@ -19,10 +35,71 @@ def build_email_connection(site_settings=None):
     return get_connection(backend=settings.EMAIL_BACKEND, fail_silently=True)
 
 
-def send_configured_email(subject, body, recipient_list, site_settings=None, template_type="", html_body=""):
-    site_settings = site_settings or SiteSettings.objects.first()
-    from_email = site_settings.default_from_email if site_settings else settings.DEFAULT_FROM_EMAIL
-    connection = build_email_connection(site_settings)
+def get_connection_fingerprint(site_settings):
+    if site_settings and site_settings.smtp_is_configured:
+        return (
+            site_settings.smtp_host,
+            site_settings.smtp_port,
+            site_settings.smtp_username,
+            site_settings.smtp_app_password,
+            site_settings.smtp_use_tls,
+        )
+    return (settings.EMAIL_BACKEND,)
+
+
+def connection_is_alive(connection):
+    smtp = getattr(connection, "connection", None)
+    if smtp is None:
+        return not hasattr(connection, "connection")
+    try:
+        return smtp.noop()[0] == 250
+    except (smtplib.SMTPException, OSError):
+        return False
+
+
+def close_shared_connection():
+    connection = getattr(_shared, "connection", None)
+    _shared.connection = None
+    _shared.fingerprint = None
+    if connection is not None:
+        connection.close()
+
+
+def get_shared_connection(site_settings=None):
+    # One authenticated session per thread, reused across sends until the
+    # server drops it or the SMTP settings change.
+    site_settings = site_settings or get_settings_snapshot().site_settings
+    fingerprint = get_connection_fingerprint(site_settings)
+    if getattr(_shared, "connection", None) is None or _shared.fingerprint != fingerprint:
+        close_shared_connection()
+        _shared.connection = build_email_connection(site_settings)
+        _shared.fingerprint = fingerprint
+    elif not connection_is_alive(_shared.connection):
+        _shared.connection.close()
+    _shared.connection.open()
+    return _shared.connection
+
+
+@timed("email")
+def send_many(messages, site_settings=None):
+    connection = get_shared_connection(site_settings)
+    results = []
+    for message in messages:
+        message.connection = connection
+        status, error_message = deliver_email_message(message)
+        if status == EmailLog.Status.FAILED and not connection_is_alive(connection):
+            connection.close()
+            connection.open()
+            status, error_message = deliver_email_message(message)
+        results.append((status, error_message))
+    return results
+
+
+def get_from_email(site_settings):
+    return site_settings.default_from_email if site_settings else settings.DEFAULT_FROM_EMAIL
+
+
+def build_email_message(subject, body, recipient_list, from_email, html_body="", connection=None):
     message = EmailMultiAlternatives(
         subject=subject,
         body=body,
@@ -32,14 +109,27 @@ def send_configured_email(subject, body, recipient_list, site_settings=None, tem
     )
     if html_body:
         message.attach_alternative(html_body, "text/html")
+    return message
+
+
+def deliver_email_message(message):
     try:
-        sent_count = message.send(fail_silently=False)
-        status = EmailLog.Status.SENT if sent_count else EmailLog.Status.FAILED
-        error_message = "" if sent_count else "Email backend returned 0 sent messages."
+        with EMAIL_SEND_LATENCY.time():
+            sent_count = message.send(fail_silently=False)
     except Exception as exc:
-        sent_count = 0
-        status = EmailLog.Status.FAILED
-        error_message = str(exc)
+        EMAIL_FAILURES.inc()
+        return EmailLog.Status.FAILED, str(exc)
+    if sent_count:
+        return EmailLog.Status.SENT, ""
+    EMAIL_FAILURES.inc()
+    return EmailLog.Status.FAILED, "Email backend returned 0 sent messages."
+
+
+def send_configured_email(subject, body, recipient_list, site_settings=None, template_type="", html_body=""):
+    site_settings = site_settings or get_settings_snapshot().site_settings
+    from_email = get_from_email(site_settings)
+    message = build_email_message(subject, body, recipient_list, from_email, html_body)
+    [(status, error_message)] = send_many([message], site_settings)
 
     return EmailLog.objects.create(
         subject=subject,
@@ -50,3 +140,81 @@ def send_configured_email(subject, body, recipient_list, site_settings=None, tem
         status=status,
         error_message=error_message,
     )
+
+
+def queue_email(subject, body, recipient_list, template_type="", html_body=""):
+    return EmailOutbox.objects.create(
+        subject=subject,
+        body=body,
+        html_body=html_body,
+        recipient_list=", ".join(recipient_list),
+        template_type=template_type,
+    )
+
+
+def get_retry_delay(attempts):
+    return timedelta(seconds=min(OUTBOX_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), OUTBOX_RETRY_MAX_SECONDS))
+
+
+def claim_outbox_batch(batch_size, now):
+    # A claim pushes next_attempt_at out by the lease, so parallel workers
+    # skip the row and a crashed worker's rows are picked up again later.
+    due = EmailOutbox.objects.filter(status=EmailOutbox.Status.PENDING, next_attempt_at__lte=now).order_by("next_attempt_at", "pk")
+    claimed = []
+    for entry in due[:batch_size]:
+        lease = now + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+        if EmailOutbox.objects.filter(pk=entry.pk, attempts=entry.attempts, status=EmailOutbox.Status.PENDING).update(
+            attempts=F("attempts") + 1,
+            next_attempt_at=lease,
+        ):
+            entry.attempts += 1
+            entry.next_attempt_at = lease
+            claimed.append(entry)
+    return claimed
+
+
+def process_email_outbox(batch_size=20):
+    now = timezone.now()
+    entries = claim_outbox_batch(batch_size, now)
+    if not entries:
+        return 0
+
+    site_settings = get_settings_snapshot().site_settings
+    from_email = get_from_email(site_settings)
+    messages = [
+        build_email_message(
+            entry.subject,
+            entry.body,
+            [recipient.strip() for recipient in entry.recipient_list.split(",") if recipient.strip()],
+            from_email,
+            entry.html_body,
+        )
+        for entry in entries
+    ]
+    logs = []
+    for entry, (status, error_message) in zip(entries, send_many(messages, site_settings)):
+        if status == EmailLog.Status.SENT:
+            entry.status = EmailOutbox.Status.SENT
+            entry.sent_at = timezone.now()
+            entry.last_error = ""
+        else:
+            entry.last_error = error_message
+            if entry.attempts >= OUTBOX_MAX_ATTEMPTS:
+                entry.status = EmailOutbox.Status.FAILED
+            else:
+                entry.next_attempt_at = timezone.now() + get_retry_delay(entry.attempts)
+        logs.append(
+            EmailLog(
+                subject=entry.subject,
+                recipient_list=entry.recipient_list,
+                from_email=from_email,
+                body=entry.body,
+                template_type=entry.template_type,
+                status=status,
+                error_message=error_message,
+            )
+        )
+
+    EmailOutbox.objects.bulk_update(entries, ["status", "sent_at", "last_error", "next_attempt_at"])
+    EmailLog.objects.bulk_create(logs)
+    return len(entries)
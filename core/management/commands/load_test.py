@@ -0,0 +1,68 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.request import HTTPRedirectHandler, Request, build_opener
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class NoRedirectHandler(HTTPRedirectHandler):
+    # A redirect is the response being measured, e.g. after a form POST.
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Command(BaseCommand):
+    help = "Fire concurrent requests at a running server and report throughput and latency percentiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", nargs="+")
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--requests", type=int, default=1000, help="Total requests per URL")
+        parser.add_argument("--timeout", type=float, default=30)
+        parser.add_argument("--method", default="GET")
+        parser.add_argument("--data", default="", help="URL-encoded form body, e.g. for a POST")
+        parser.add_argument("--header", action="append", default=[], help='Extra header as "Name: value"; repeatable')
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["requests"] < 1:
+            raise CommandError("--concurrency and --requests must be at least 1.")
+        headers = {}
+        for header in options["header"]:
+            name, separator, value = header.partition(":")
+            if not separator:
+                raise CommandError(f'Headers must look like "Name: value", got {header!r}.')
+            headers[name.strip()] = value.strip()
+        if options["data"]:
+            headers.setdefault("Content-Type", "application/x-www-form-urlencoded")
+        self.opener = build_opener(NoRedirectHandler)
+        for url in options["url"]:
+            self.run_url(url, headers, options)
+
+    def fetch(self, url, headers, options):
+        request = Request(url, data=options["data"].encode() or None, headers=headers, method=options["method"])
+        started = time.perf_counter()
+        try:
+            with self.opener.open(request, timeout=options["timeout"]) as response:
+                response.read()
+                ok = response.status < 400
+        except HTTPError as error:
+            ok = error.code < 400
+        except (URLError, OSError):
+            ok = False
+        return time.perf_counter() - started, ok
+
+    def run_url(self, url, headers, options):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            results = list(executor.map(lambda _: self.fetch(url, headers, options), range(options["requests"])))
+        elapsed = time.perf_counter() - started
+        latencies = sorted(duration for duration, _ in results)
+        errors = sum(1 for _, ok in results if not ok)
+        percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        self.stdout.write(
+            f"{options['method']} {url}: {len(results) / elapsed:.1f} req/s, "
+            f"p50 {percentiles[49] * 1000:.0f} ms, p95 {percentiles[94] * 1000:.0f} ms, p99 {percentiles[98] * 1000:.0f} ms, "
+            f"{errors} errors ({options['requests']} requests, concurrency {options['concurrency']})"
+        )
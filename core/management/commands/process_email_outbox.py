@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.email_utils import close_shared_connection, process_email_outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails from the outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=20)
+        parser.add_argument("--loop", action="store_true", help="Keep polling the outbox instead of exiting when it is empty")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds to wait between polls of an empty outbox")
+
+    def handle(self, *args, **options):
+        total = 0
+        try:
+            while True:
+                close_old_connections()
+                processed = process_email_outbox(batch_size=options["batch_size"])
+                total += processed
+                if processed:
+                    self.stdout.write(f"Processed {processed} queued emails.")
+                    continue
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            close_shared_connection()
+        self.stdout.write(self.style.SUCCESS(f"Email outbox processed: {total} emails."))
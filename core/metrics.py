@@ -0,0 +1,63 @@
+import os
+
+from django.db.models import Count
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+from core.models import EmailOutbox
+
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    # The unlabelled metrics below open their files on import, which can come
+    # before Gunicorn has created the directory (outbox worker, manage.py).
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+REQUEST_LATENCY = Histogram(
+    "lknails_request_duration_seconds",
+    "Request latency by URL name",
+    ["view", "method"],
+)
+REQUESTS = Counter("lknails_requests", "Responses by URL name and status code", ["view", "method", "status"])
+BOOKINGS_CREATED = Counter("lknails_bookings_created", "Bookings created through the booking form")
+BOOKING_FAILURES = Counter("lknails_booking_failures", "Rejected booking submissions by reason", ["reason"])
+SLOT_LATENCY = Histogram(
+    "lknails_slot_computation_seconds",
+    "Time spent computing free slots",
+    ["operation"],
+    buckets=FAST_BUCKETS,
+)
+EMAIL_SEND_LATENCY = Histogram("lknails_email_send_seconds", "Time spent handing one email to the mail backend")
+EMAIL_FAILURES = Counter("lknails_email_failures", "Emails the mail backend did not accept")
+CACHE_LOOKUPS = Counter("lknails_cache_lookups", "Cache lookups by cache and result", ["cache", "result"])
+
+
+def record_cache_lookups(cache_name, hits, misses=0):
+    if hits:
+        CACHE_LOOKUPS.labels(cache_name, "hit").inc(hits)
+    if misses:
+        CACHE_LOOKUPS.labels(cache_name, "miss").inc(misses)
+
+
+class OutboxCollector:
+    # Read from the database on every scrape, so it is right whatever process
+    # queued or delivered the messages.
+    def collect(self):
+        gauge = GaugeMetricFamily("lknails_email_outbox_messages", "Email outbox messages by status", labels=["status"])
+        counts = dict(EmailOutbox.objects.values_list("status").annotate(count=Count("pk")).order_by())
+        for status in EmailOutbox.Status.values:
+            gauge.add_metric([status], counts.get(status, 0))
+        yield gauge
+
+
+def render_metrics():
+    # With PROMETHEUS_MULTIPROC_DIR set (see gunicorn.conf.py), the values of
+    # all worker processes are read from that directory and summed.
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    scrape_registry = CollectorRegistry(auto_describe=False)
+    scrape_registry.register(OutboxCollector())
+    return generate_latest(registry) + generate_latest(scrape_registry)
@@ -0,0 +1,139 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from core.metrics import REQUEST_LATENCY, REQUESTS
+from core.timing import start_request_timings, stop_request_timings
+
+logger = logging.getLogger("lknails.requests")
+
+
+def wrap_connections(stack, timings):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(timings.time_query))
+
+
+class ServerTimingMiddleware:
+    # Adds a Server-Timing header and logs one JSON line per request. Turned
+    # off entirely unless settings.SERVER_TIMING is set.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings, token = start_request_timings()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                wrap_connections(stack, timings)
+                response = self.get_response(request)
+        finally:
+            stop_request_timings(token)
+        return self.finish(request, response, timings, started)
+
+    async def __acall__(self, request):
+        # Under ASGI the ORM runs in the request's sync thread, so the query
+        # wrappers are installed (and removed) there.
+        timings, token = start_request_timings()
+        started = time.perf_counter()
+        stack = ExitStack()
+        try:
+            await sync_to_async(wrap_connections)(stack, timings)
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            stop_request_timings(token)
+        return self.finish(request, response, timings, started)
+
+    def finish(self, request, response, timings, started):
+        # A streamed body is produced after the headers are sent: the header
+        # says so, and the log line is written once the stream is consumed.
+        total = time.perf_counter() - started
+        server_timing = timings.get_server_timing(total)
+        if response.streaming:
+            server_timing += ', stream;desc="Body not included"'
+            stream = self.time_async_stream if response.is_async else self.time_stream
+            response.streaming_content = stream(request, response, response.streaming_content, timings, started)
+        else:
+            self.log(request, response, timings, total)
+        response.headers["Server-Timing"] = server_timing
+        return response
+
+    def time_stream(self, request, response, content, timings, started):
+        try:
+            with ExitStack() as stack:
+                wrap_connections(stack, timings)
+                yield from content
+        finally:
+            self.log(request, response, timings, time.perf_counter() - started)
+
+    async def time_async_stream(self, request, response, content, timings, started):
+        stack = ExitStack()
+        try:
+            await sync_to_async(wrap_connections)(stack, timings)
+            async for part in content:
+                yield part
+        finally:
+            await sync_to_async(stack.close)()
+            self.log(request, response, timings, time.perf_counter() - started)
+
+    def log(self, request, response, timings, total):
+        logger.info(
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "streamed": response.streaming,
+                    "duration_ms": round(total * 1000, 1),
+                    **timings.as_log_fields(),
+                }
+            )
+        )
+
+
+class MetricsMiddleware:
+    # Request latency per URL name for /metrics. Turned off entirely unless
+    # settings.METRICS is set.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        return self.finish(request, response, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        return self.finish(request, response, time.perf_counter() - started)
+
+    def finish(self, request, response, duration):
+        resolver_match = getattr(request, "resolver_match", None)
+        view = resolver_match.url_name if resolver_match and resolver_match.url_name else "unmatched"
+        REQUEST_LATENCY.labels(view, request.method).observe(duration)
+        REQUESTS.labels(view, request.method, response.status_code).inc()
+        return response
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.12 on 2026-10-18 15:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sitesettings',
+            name='calendar_feed_token',
+            field=models.CharField(blank=True, default='', help_text='Secret for the staff calendar subscription (.ics). Leave empty to disable the feed.', max_length=64),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -23,6 +24,12 @@ class SiteSettings(models.Model):
     booking_slot_minutes = models.PositiveIntegerField(default=15)
     concurrent_capacity = models.PositiveIntegerField(default=3)
     timezone = models.CharField(max_length=64, default="Europe/Berlin")
+    calendar_feed_token = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        help_text=_("Secret for the staff calendar subscription (.ics). Leave empty to disable the feed."),
+    )
 
     class Meta:
         verbose_name = _("site settings")
@@ -117,3 +124,30 @@ class EmailLog(models.Model):
 
     def __str__(self):
         return f"{self.get_status_display()} - {self.subject}"
+
+
+class EmailOutbox(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        SENT = "sent", _("Sent")
+        FAILED = "failed", _("Failed")
+
+    subject = models.CharField(max_length=200)
+    recipient_list = models.TextField(help_text=_("Comma-separated recipient emails"))
+    body = models.TextField(blank=True)
+    html_body = models.TextField(blank=True)
+    template_type = models.CharField(max_length=32, blank=True)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        verbose_name_plural = _("email outbox")
+        indexes = [models.Index(fields=["status", "next_attempt_at"], name="core_outbox_due_idx")]
+
+    def __str__(self):
+        return f"{self.get_status_display()} - {self.subject}"
@@ -0,0 +1,104 @@
+import hashlib
+import math
+from datetime import timedelta
+
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from core.metrics import record_cache_lookups
+from core.settings_cache import get_settings_snapshot
+from services.catalog import get_catalog_state, get_catalog_version
+
+PAGE_CACHE_TIMEOUT = 60 * 60
+CSRF_PLACEHOLDER = "lk-page-cache-csrf-token"
+
+
+def is_page_cacheable(request):
+    if request.method not in ("GET", "HEAD") or request.user.is_authenticated:
+        return False
+    return not len(get_messages(request))
+
+
+def get_page_cache_key(request):
+    url_hash = hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+    return f"page:{get_catalog_version()}:{request.LANGUAGE_CODE}:{url_hash}"
+
+
+def build_etag(*parts):
+    return quote_etag(hashlib.sha1(repr(parts).encode()).hexdigest())
+
+
+def set_validators(response, etag, last_modified=None):
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+class CachedPageMixin:
+    # Anonymous pages are cached whole until the catalog changes or the next
+    # promotion starts or ends. The per-visitor CSRF token is rendered as a
+    # placeholder and filled in on every response.
+    page_cache_timeout = PAGE_CACHE_TIMEOUT
+
+    def dispatch(self, request, *args, **kwargs):
+        self.page_cache_key = None
+        if not is_page_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+        last_modified, next_price_change = get_catalog_state()
+        # The page carries a token for the visitor's CSRF secret, so the ETag
+        # follows that secret (issued here if the visitor has none yet) and
+        # only the ETag answers 304: a date cannot tell that the secret
+        # rotated since the page was fetched.
+        get_token(request)
+        etag = build_etag(
+            get_catalog_version(),
+            get_settings_snapshot().version,
+            next_price_change,
+            request.LANGUAGE_CODE,
+            request.get_full_path(),
+            request.META["CSRF_COOKIE"],
+        )
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return set_validators(response, etag, last_modified)
+        key = get_page_cache_key(request)
+        entry = cache.get(key)
+        hit = bool(entry and entry[0] > timezone.now())
+        record_cache_lookups("page", hit, not hit)
+        if hit:
+            expires_at, content_type, content = entry
+            return set_validators(HttpResponse(self.fill_csrf_token(content), content_type=content_type), etag, last_modified)
+        self.page_cache_key = key
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200 and hasattr(response, "add_post_render_callback"):
+            response.add_post_render_callback(self.store_page)
+            set_validators(response, etag, last_modified)
+        return response
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if self.page_cache_key:
+            context["csrf_token"] = CSRF_PLACEHOLDER
+        return context
+
+    def fill_csrf_token(self, content):
+        return content.replace(CSRF_PLACEHOLDER.encode(), get_token(self.request).encode())
+
+    def store_page(self, response):
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=self.page_cache_timeout)
+        next_price_change = get_catalog_state(now)[1]
+        if next_price_change and next_price_change < expires_at:
+            expires_at = next_price_change
+        timeout = math.ceil((expires_at - now).total_seconds())
+        if timeout > 0:
+            cache.set(self.page_cache_key, (expires_at, response["Content-Type"], response.content), timeout)
+        response.content = self.fill_csrf_token(response.content)
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.email_templates import bump_email_templates_version
+from core.models import EmailTemplate, SiteSettings, WorkingHour
+from core.settings_cache import bump_settings_version
+
+
+@receiver(post_save, sender=SiteSettings)
+@receiver(post_delete, sender=SiteSettings)
+@receiver(post_save, sender=WorkingHour)
+@receiver(post_delete, sender=WorkingHour)
+def site_configuration_changed(sender, **kwargs):
+    bump_settings_version()
+
+
+@receiver(post_save, sender=EmailTemplate)
+@receiver(post_delete, sender=EmailTemplate)
+def email_template_changed(sender, **kwargs):
+    bump_email_templates_version()
@@ -1,11 +1,14 @@
-from django.http import HttpResponse, JsonResponse
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
 from django.urls import reverse
+from prometheus_client import CONTENT_TYPE_LATEST
 
-from core.models import SiteSettings
+from core.metrics import render_metrics
+from core.settings_cache import get_settings_snapshot
 
 
 def robots_txt(_request):
-    site_settings = SiteSettings.objects.first()
+    site_settings = get_settings_snapshot().site_settings
     domain = site_settings.domain if site_settings else "lknailslashes.de"
     content = f"User-agent: *\nAllow: /\nSitemap: https://{domain}/sitemap.xml\n"
     return HttpResponse(content, content_type="text/plain")
@@ -23,5 +26,11 @@ def sitemap_xml(request):
     return HttpResponse("".join(xml), content_type="application/xml")
 
 
-def health_check(_request):
+async def health_check(_request):
     return JsonResponse({"status": "ok"})
+
+
+def metrics_view(_request):
+    if not settings.METRICS:
+        raise Http404
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE_LATEST)
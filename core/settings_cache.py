@@ -0,0 +1,74 @@
+import threading
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.dispatch import receiver
+
+from core.models import SiteSettings, WorkingHour
+from core.versioning import bump_version, get_version
+
+SETTINGS_VERSION_KEY = "site-settings:version"
+
+_snapshot = None
+_local = threading.local()
+
+
+class SettingsSnapshot:
+    def __init__(self, version, site_settings, working_hours):
+        self.version = version
+        self.site_settings = site_settings
+        self.effective_settings = site_settings or SiteSettings(
+            booking_slot_minutes=15,
+            concurrent_capacity=3,
+            timezone="Europe/Berlin",
+            site_name="LK Nails & Lashes",
+            domain="lknailslashes.de",
+        )
+        self.timezone = ZoneInfo(self.effective_settings.timezone or settings.TIME_ZONE)
+        self.open_hours = {working_hour.weekday: working_hour for working_hour in working_hours if working_hour.is_open}
+        self.closed_weekdays = [working_hour.weekday for working_hour in working_hours if not working_hour.is_open]
+
+
+def get_settings_version():
+    return get_version(SETTINGS_VERSION_KEY)
+
+
+def clear_settings_snapshot():
+    global _snapshot
+    _snapshot = None
+
+
+def bump_settings_version():
+    bump_version(SETTINGS_VERSION_KEY, clear_settings_snapshot)
+
+
+def get_settings_snapshot():
+    # Inside a request the shared version is checked once; management
+    # commands and workers check it on every call.
+    global _snapshot
+    snapshot = _snapshot
+    if snapshot is not None and getattr(_local, "checked", False):
+        return snapshot
+    version = get_settings_version()
+    if snapshot is None or snapshot.version != version:
+        snapshot = SettingsSnapshot(version, SiteSettings.objects.first(), list(WorkingHour.objects.all()))
+        _snapshot = snapshot
+    _local.checked = getattr(_local, "in_request", False)
+    return snapshot
+
+
+def get_site_settings():
+    return get_settings_snapshot().effective_settings
+
+
+@receiver(request_started)
+def start_settings_check(sender, **kwargs):
+    _local.in_request = True
+    _local.checked = False
+
+
+@receiver(request_finished)
+def finish_settings_check(sender, **kwargs):
+    _local.in_request = False
+    _local.checked = False
@@ -0,0 +1,29 @@
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+STREAM_BATCH_SIZE = 500
+
+
+async def iterate_in_thread(iterator, batch_size=STREAM_BATCH_SIZE):
+    # Batches are pulled through sync_to_async, which runs them in the
+    # request's sync thread, so an ORM cursor stays on its connection.
+    iterator = iter(iterator)
+    take = sync_to_async(lambda: list(islice(iterator, batch_size)))
+    try:
+        while batch := await take():
+            for part in batch:
+                yield part
+    finally:
+        if hasattr(iterator, "close"):
+            await sync_to_async(iterator.close)()
+
+
+def streaming_response(request, content, **kwargs):
+    # Under ASGI Django reads a sync iterator into a list before sending the
+    # first byte, so it is handed over as an async iterator there.
+    if isinstance(request, ASGIRequest):
+        content = iterate_in_thread(content)
+    return StreamingHttpResponse(content, **kwargs)
@@ -1,5 +1,22 @@
-from django.test import TestCase
+import json
+import re
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY
+
+from core.checks import check_shared_cache
+from core.models import EmailOutbox, SiteSettings, WorkingHour
+from core.page_cache import CSRF_PLACEHOLDER, get_page_cache_key
+from services.models import Promotion, Service
+from core.settings_cache import get_settings_snapshot, get_site_settings
+from core.streaming import iterate_in_thread
 
 
 class HomePageTests(TestCase):
@@ -18,3 +35,243 @@ class HomePageTests(TestCase):
     def test_health_check_returns_ok(self):
         response = self.client.get(reverse("health_check"))
         self.assertEqual(response.status_code, 200)
+
+
+class SettingsSnapshotTests(TestCase):
+    def test_snapshot_is_reused_until_settings_change(self):
+        site_settings = SiteSettings.objects.create(site_name="LK", concurrent_capacity=2)
+        WorkingHour.objects.create(weekday=0, is_open=True, open_time=time(9, 0), close_time=time(16, 0))
+        self.assertEqual(get_site_settings().concurrent_capacity, 2)
+        with self.assertNumQueries(0):
+            snapshot = get_settings_snapshot()
+            self.assertEqual(snapshot.open_hours[0].close_time, time(16, 0))
+            self.assertEqual(str(snapshot.timezone), "Europe/Berlin")
+        site_settings.concurrent_capacity = 4
+        site_settings.save()
+        self.assertEqual(get_site_settings().concurrent_capacity, 4)
+
+    def test_snapshot_built_before_commit_is_dropped_after_commit(self):
+        site_settings = SiteSettings.objects.create(site_name="LK", concurrent_capacity=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            site_settings.concurrent_capacity = 4
+            site_settings.save()
+            stale = get_settings_snapshot()
+        self.assertIsNot(get_settings_snapshot(), stale)
+
+    def test_request_checks_settings_version_once(self):
+        SiteSettings.objects.create(site_name="LK")
+        self.client.get(reverse("robots_txt"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("robots_txt"))
+        self.assertContains(response, "Sitemap")
+
+    def test_process_local_cache_is_flagged_outside_debug(self):
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        filebased = {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": "/tmp/lknails"}}
+        with override_settings(DEBUG=False, CACHES=locmem):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ["core.W001"])
+        with override_settings(DEBUG=False, CACHES=filebased):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        SiteSettings.objects.create(site_name="LK")
+        self.service = Service.objects.create(name="Gel Manicure", category="Nägel", price=Decimal("40.00"), duration_minutes=45)
+
+    def test_anonymous_pages_are_served_from_cache_until_the_catalog_changes(self):
+        self.client.get(reverse("service_list"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("service_list"))
+        self.assertContains(response, "Gel Manicure")
+        self.assertNotContains(response, CSRF_PLACEHOLDER)
+        self.assertContains(response, "csrfmiddlewaretoken")
+
+        self.service.name = "Gel Deluxe"
+        self.service.save()
+        self.assertContains(self.client.get(reverse("service_list")), "Gel Deluxe")
+
+    def test_pages_vary_on_language_and_skip_staff(self):
+        self.client.get("/de/services/")
+        self.assertContains(self.client.get("/en/services/"), 'is-active" aria-label="English"')
+        self.assertContains(self.client.get("/de/services/"), 'is-active" aria-label="Deutsch"')
+        staff = get_user_model().objects.create_user("staff", password="secret", is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse("gallery"))
+        self.assertContains(response, "Gel Manicure")
+        self.assertIsNone(cache.get(get_page_cache_key(response.wsgi_request)))
+
+    def test_cached_page_carries_a_working_csrf_token(self):
+        self.client.get(reverse("home"))
+        client = Client(enforce_csrf_checks=True)
+        response = client.get(reverse("home"))
+        token = re.search(rb'name="csrfmiddlewaretoken" value="([^"]+)"', response.content).group(1).decode()
+        response = client.post(reverse("set_language"), {"language": "de", "next": "/", "csrfmiddlewaretoken": token})
+        self.assertEqual(response.status_code, 302)
+
+    def test_rotated_csrf_cookie_gets_a_fresh_page(self):
+        client = Client(enforce_csrf_checks=True)
+        response = client.get(reverse("home"))
+        etag = response["ETag"]
+        self.assertEqual(client.get(reverse("home"), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        client.cookies[settings.CSRF_COOKIE_NAME] = "x" * 32
+        response = client.get(reverse("home"), HTTP_IF_NONE_MATCH=etag, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, 200)
+        token = re.search(rb'name="csrfmiddlewaretoken" value="([^"]+)"', response.content).group(1).decode()
+        response = client.post(reverse("set_language"), {"language": "de", "next": "/", "csrfmiddlewaretoken": token})
+        self.assertEqual(response.status_code, 302)
+
+    def test_unchanged_catalog_page_answers_not_modified(self):
+        response = self.client.get(reverse("gallery"))
+        self.assertIn("no-cache", response["Cache-Control"])
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("gallery"), HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+        etag = response["ETag"]
+        self.service.price = Decimal("45.00")
+        self.service.save()
+        response = self.client.get(reverse("gallery"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_cached_page_expires_at_next_promotion_boundary(self):
+        starts_at = timezone.now() + timedelta(minutes=10)
+        Promotion.objects.create(
+            service=self.service,
+            title="Weekend",
+            start_at=starts_at,
+            end_at=starts_at + timedelta(days=2),
+            promotional_price=Decimal("30.00"),
+        )
+        response = self.client.get(reverse("service_list"))
+        expires_at = cache.get(get_page_cache_key(response.wsgi_request))[0]
+        self.assertEqual(expires_at, starts_at)
+
+
+class StreamingTests(TestCase):
+    async def test_sync_iterators_are_pulled_in_batches(self):
+        pulled = []
+
+        def produce():
+            for index in range(5):
+                pulled.append(index)
+                yield index
+
+        stream = iterate_in_thread(produce(), batch_size=2)
+        self.assertEqual(await anext(stream), 0)
+        self.assertEqual(pulled, [0, 1])
+        self.assertEqual([part async for part in stream], [1, 2, 3, 4])
+
+
+@override_settings(SERVER_TIMING=True)
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        SiteSettings.objects.create(site_name="LK")
+        self.target_date = timezone.localdate() + timedelta(days=1)
+        WorkingHour.objects.create(weekday=self.target_date.weekday(), is_open=True, open_time=time(9, 0), close_time=time(12, 0))
+        self.service = Service.objects.create(name="Gel", category="Nails", price=Decimal("30.00"), duration_minutes=30)
+
+    def get_metrics(self, response):
+        return {entry.split(";")[0]: entry for entry in response["Server-Timing"].split(", ")}
+
+    def test_page_reports_sql_and_template_time(self):
+        with self.assertLogs("lknails.requests", "INFO") as logs:
+            response = Client().get(reverse("service_list"))
+        metrics = self.get_metrics(response)
+        self.assertEqual(set(metrics), {"app", "db", "template"})
+        self.assertRegex(metrics["db"], r'^db;dur=[\d.]+;desc="SQL \(\d+\)"$')
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line["path"], response.wsgi_request.path)
+        self.assertEqual(line["status"], 200)
+        self.assertEqual(line["template_count"], 1)
+        self.assertGreater(line["db_count"], 0)
+
+    def test_availability_is_timed_once_per_request(self):
+        with self.assertLogs("lknails.requests", "INFO") as logs:
+            response = Client().get(reverse("available_slots"), {"date": self.target_date.isoformat(), "services": [self.service.pk]})
+        self.assertIn("availability", self.get_metrics(response))
+        self.assertEqual(json.loads(logs.records[0].getMessage())["availability_count"], 1)
+
+    async def test_async_views_report_sql_time(self):
+        with self.assertLogs("lknails.requests", "INFO"):
+            response = await self.async_client.get(
+                reverse("available_slots"), {"date": self.target_date.isoformat(), "services": [self.service.pk]}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["slots"])
+        self.assertEqual(set(self.get_metrics(response)), {"app", "db", "availability"})
+
+    def test_streamed_body_queries_are_logged(self):
+        user = get_user_model().objects.create_user("staff", password="pass", is_staff=True)
+        client = Client()
+        client.force_login(user)
+        with self.assertLogs("lknails.requests", "INFO") as logs:
+            response = client.get(reverse("admin_bookings_export"))
+            self.assertEqual(logs.output, [])
+            b"".join(response.streaming_content)
+        self.assertIn("stream", self.get_metrics(response))
+        line = json.loads(logs.records[0].getMessage())
+        self.assertTrue(line["streamed"])
+        self.assertGreaterEqual(line["db_count"], 3)
+
+    async def test_async_streamed_body_queries_are_logged(self):
+        user = await get_user_model().objects.acreate_user("staff", password="pass", is_staff=True)
+        await self.async_client.aforce_login(user)
+        with self.assertLogs("lknails.requests", "INFO") as logs:
+            response = await self.async_client.get(reverse("admin_bookings_export"))
+            self.assertTrue(response.is_async)
+            [part async for part in response.streaming_content]
+        self.assertGreaterEqual(json.loads(logs.records[0].getMessage())["db_count"], 3)
+
+    @override_settings(SERVER_TIMING=False)
+    def test_setting_turns_the_middleware_off(self):
+        self.assertNotIn("Server-Timing", Client().get(reverse("service_list")))
+
+
+@override_settings(METRICS=True)
+class MetricsTests(TestCase):
+    def setUp(self):
+        SiteSettings.objects.create(site_name="LK")
+        self.target_date = timezone.localdate() + timedelta(days=1)
+        WorkingHour.objects.create(weekday=self.target_date.weekday(), is_open=True, open_time=time(9, 0), close_time=time(12, 0))
+        self.service = Service.objects.create(name="Gel", category="Nails", price=Decimal("30.00"), duration_minutes=30)
+
+    def get_sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_metrics_endpoint_exposes_request_slot_and_outbox_metrics(self):
+        client = Client()
+        requests_before = self.get_sample("lknails_request_duration_seconds_count", view="available_slots", method="GET")
+        slots_before = self.get_sample("lknails_slot_computation_seconds_count", operation="slots_api")
+        misses_before = self.get_sample("lknails_cache_lookups_total", cache="availability", result="miss")
+        client.get(reverse("available_slots"), {"date": self.target_date.isoformat(), "services": [self.service.pk]})
+        EmailOutbox.objects.create(subject="Queued", recipient_list="guest@example.com")
+
+        response = client.get(reverse("metrics"))
+        self.assertEqual(response["Content-Type"], CONTENT_TYPE_LATEST)
+        content = response.content.decode()
+        self.assertIn('lknails_email_outbox_messages{status="pending"} 1.0', content)
+        self.assertIn("# TYPE lknails_request_duration_seconds histogram", content)
+        self.assertEqual(self.get_sample("lknails_request_duration_seconds_count", view="available_slots", method="GET"), requests_before + 1)
+        self.assertEqual(self.get_sample("lknails_slot_computation_seconds_count", operation="slots_api"), slots_before + 1)
+        self.assertEqual(self.get_sample("lknails_cache_lookups_total", cache="availability", result="miss"), misses_before + 1)
+
+    def test_booking_failures_are_counted_by_reason(self):
+        closed_date = self.target_date + timedelta(days=1)
+        before = self.get_sample("lknails_booking_failures_total", reason="closed")
+        Client().post(
+            reverse("booking_create"),
+            {
+                "customer_name": "Guest",
+                "phone": "123",
+                "email": "guest@example.com",
+                "appointment_date": closed_date.isoformat(),
+                "appointment_time": "10:00",
+                "services": [self.service.pk],
+            },
+        )
+        self.assertEqual(self.get_sample("lknails_booking_failures_total", reason="closed"), before + 1)
+
+    @override_settings(METRICS=False)
+    def test_metrics_endpoint_is_off_by_default(self):
+        self.assertEqual(Client().get(reverse("metrics")).status_code, 404)
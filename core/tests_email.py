@@ -1,8 +1,23 @@
+import smtplib
+from datetime import timedelta
+from unittest import mock
+
 from django.core import mail
+from django.core.management import call_command
 from django.test import TestCase, override_settings
+from django.utils import timezone
 
-from core.email_utils import build_email_connection, send_configured_email
-from core.models import EmailLog, SiteSettings
+from core.email_utils import (
+    OUTBOX_MAX_ATTEMPTS,
+    build_email_connection,
+    close_shared_connection,
+    process_email_outbox,
+    queue_email,
+    send_configured_email,
+    send_many,
+)
+from core.email_templates import bump_email_templates_version, get_email_templates_version, render_email_template
+from core.models import EmailLog, EmailOutbox, EmailTemplate, SiteSettings
 
 
 class EmailConfigTests(TestCase):
@@ -39,3 +54,116 @@ class EmailConfigTests(TestCase):
         SiteSettings.objects.create(site_name="LK")
         send_configured_email("Subject", "Body", ["guest@example.com"], html_body="<p>Hello</p>")
         self.assertEqual(mail.outbox[0].alternatives[0].content, "<p>Hello</p>")
+
+
+class SharedSMTPConnectionTests(TestCase):
+    def setUp(self):
+        self.settings = SiteSettings.objects.create(
+            site_name="LK",
+            smtp_host="smtp.gmail.com",
+            smtp_port=587,
+            smtp_use_tls=True,
+            smtp_username="owner@example.com",
+            smtp_app_password="app-password",
+        )
+        patcher = mock.patch("smtplib.SMTP")
+        self.smtp_class = patcher.start()
+        self.smtp_class.return_value.noop.return_value = (250, b"OK")
+        self.smtp_class.return_value.sendmail.return_value = {}
+        self.addCleanup(patcher.stop)
+        self.addCleanup(close_shared_connection)
+
+    def test_sends_reuse_one_authenticated_session(self):
+        send_configured_email("First", "Body", ["guest@example.com"], site_settings=self.settings)
+        send_many(
+            [mail.EmailMessage("Second", "Body", to=["a@example.com"]), mail.EmailMessage("Third", "Body", to=["b@example.com"])],
+            self.settings,
+        )
+        self.assertEqual(self.smtp_class.call_count, 1)
+        self.assertEqual(self.smtp_class.return_value.login.call_count, 1)
+        self.assertEqual(self.smtp_class.return_value.sendmail.call_count, 3)
+
+    def test_reconnects_when_noop_fails_or_settings_change(self):
+        send_configured_email("First", "Body", ["guest@example.com"], site_settings=self.settings)
+        self.smtp_class.return_value.noop.side_effect = smtplib.SMTPServerDisconnected
+        send_configured_email("Second", "Body", ["guest@example.com"], site_settings=self.settings)
+        self.assertEqual(self.smtp_class.call_count, 2)
+
+        self.smtp_class.return_value.noop.side_effect = None
+        self.settings.smtp_app_password = "rotated"
+        self.settings.save()
+        send_configured_email("Third", "Body", ["guest@example.com"], site_settings=self.settings)
+        self.assertEqual(self.smtp_class.call_count, 3)
+        self.assertEqual(self.smtp_class.return_value.login.call_args.args, ("owner@example.com", "rotated"))
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        SiteSettings.objects.create(site_name="LK", contact_email="owner@example.com")
+
+    def test_worker_delivers_queued_email_and_logs_it(self):
+        queue_email("Subject", "Body", ["guest@example.com"], template_type="customer_confirmation", html_body="<p>Hi</p>")
+        self.assertEqual(len(mail.outbox), 0)
+        call_command("process_email_outbox", stdout=mock.Mock())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].alternatives[0].content, "<p>Hi</p>")
+        entry = EmailOutbox.objects.get()
+        self.assertEqual(entry.status, EmailOutbox.Status.SENT)
+        self.assertEqual(EmailLog.objects.get().template_type, "customer_confirmation")
+
+    def test_failed_delivery_is_retried_with_backoff(self):
+        entry = queue_email("Subject", "Body", ["guest@example.com"])
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=OSError("boom")):
+            self.assertEqual(process_email_outbox(), 1)
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, EmailOutbox.Status.PENDING)
+        self.assertEqual(entry.attempts, 1)
+        self.assertGreater(entry.next_attempt_at, timezone.now() + timedelta(seconds=30))
+        self.assertEqual(process_email_outbox(), 0)
+        self.assertEqual(EmailLog.objects.get().status, EmailLog.Status.FAILED)
+
+    def test_entry_fails_after_max_attempts(self):
+        entry = queue_email("Subject", "Body", ["guest@example.com"])
+        EmailOutbox.objects.filter(pk=entry.pk).update(attempts=OUTBOX_MAX_ATTEMPTS - 1)
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", return_value=0):
+            process_email_outbox()
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, EmailOutbox.Status.FAILED)
+
+
+class EmailTemplateCacheTests(TestCase):
+    def test_compiled_templates_are_reused_until_a_template_is_saved(self):
+        self.addCleanup(bump_email_templates_version)
+        email_template = EmailTemplate.objects.create(
+            name="Confirmation",
+            template_type=EmailTemplate.TemplateType.CUSTOMER_CONFIRMATION,
+            subject="Booking {{ booking_reference }}",
+            body="Hello {{ customer_name }}",
+        )
+        context = {"booking_reference": "LK1", "customer_name": "Anna"}
+        render_email_template("customer_confirmation", "Fallback", "Fallback", context)
+        with self.assertNumQueries(0), mock.patch("core.email_templates.Template") as template_class:
+            rendered = render_email_template("customer_confirmation", "Fallback", "Fallback", context)
+        template_class.assert_not_called()
+        self.assertEqual(rendered, ("Booking LK1", "Hello Anna", ""))
+
+        email_template.body = "Hi {{ customer_name }}"
+        email_template.save()
+        rendered = render_email_template("customer_confirmation", "Fallback", "Fallback", context)
+        self.assertEqual(rendered, ("Booking LK1", "Hi Anna", ""))
+        self.assertEqual(render_email_template("admin_booking", "Fallback", "Body", context), ("Fallback", "Body", ""))
+
+    def test_templates_compiled_before_commit_are_reloaded_after_commit(self):
+        self.addCleanup(bump_email_templates_version)
+        context = {"customer_name": "Anna"}
+        with self.captureOnCommitCallbacks(execute=True):
+            EmailTemplate.objects.create(
+                name="Confirmation",
+                template_type=EmailTemplate.TemplateType.CUSTOMER_CONFIRMATION,
+                subject="Booking",
+                body="Hello {{ customer_name }}",
+            )
+            version = get_email_templates_version()
+        self.assertNotEqual(get_email_templates_version(), version)
+        self.assertEqual(render_email_template("customer_confirmation", "Fallback", "Fallback", context)[1], "Hello Anna")
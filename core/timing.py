@@ -0,0 +1,71 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_request_timings = ContextVar("request_timings", default=None)
+
+TIMING_METRICS = [
+    ("db", "SQL"),
+    ("template", "Templates"),
+    ("availability", "Availability"),
+    ("email", "Email"),
+]
+
+
+class RequestTimings:
+    def __init__(self):
+        self.durations = {}
+        self.counts = {}
+        self.active = set()
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def time_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add("db", time.perf_counter() - started)
+
+    def get_server_timing(self, total):
+        # Metrics overlap: templates include the queries run while rendering.
+        entries = [f"app;dur={total * 1000:.1f}"]
+        for name, label in TIMING_METRICS:
+            if name in self.durations:
+                entries.append(f'{name};dur={self.durations[name] * 1000:.1f};desc="{label} ({self.counts[name]})"')
+        return ", ".join(entries)
+
+    def as_log_fields(self):
+        fields = {}
+        for name, _ in TIMING_METRICS:
+            fields[f"{name}_ms"] = round(self.durations.get(name, 0.0) * 1000, 1)
+            fields[f"{name}_count"] = self.counts.get(name, 0)
+        return fields
+
+
+def start_request_timings():
+    timings = RequestTimings()
+    return timings, _request_timings.set(timings)
+
+
+def stop_request_timings(token):
+    _request_timings.reset(token)
+
+
+@contextmanager
+def timed(name):
+    # Also usable as a decorator. Outside an instrumented request, or when a
+    # timed block of the same name is already running, it does nothing.
+    timings = _request_timings.get()
+    if timings is None or name in timings.active:
+        yield
+        return
+    timings.active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.active.discard(name)
+        timings.add(name, time.perf_counter() - started)
@@ -0,0 +1,26 @@
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        version = uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(key, on_change=None):
+    # Bumped now and again after commit, so anything built from pre-commit
+    # rows in between is not kept under the new version. on_change runs with
+    # each bump for state that has to follow the version.
+    def set_version():
+        cache.set(key, uuid4().hex, None)
+        if on_change:
+            on_change()
+
+    set_version()
+    transaction.on_commit(set_version)
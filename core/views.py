@@ -1,17 +1,19 @@
 from django.views.generic import TemplateView
 
 from bookings.models import Booking
-from core.models import SiteSettings
-from services.models import Service
+from core.page_cache import CachedPageMixin
+from core.settings_cache import get_settings_snapshot
+from services.catalog import build_catalog_snapshot
 
 
-class HomeView(TemplateView):
+class HomeView(CachedPageMixin, TemplateView):
     template_name = "core/home.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["featured_services"] = Service.objects.filter(is_active=True, featured=True)[:6]
-        context["top_services"] = Service.objects.filter(is_active=True).order_by("-booking_count", "name")[:6]
+        catalog = build_catalog_snapshot()
+        context["featured_services"] = catalog.featured[:6]
+        context["top_services"] = catalog.by_popularity[:6]
         context["latest_bookings"] = Booking.objects.exclude(status=Booking.Status.CANCELLED).order_by("-created_at")[:4]
-        context["site_settings"] = SiteSettings.objects.first()
+        context["site_settings"] = get_settings_snapshot().site_settings
         return context
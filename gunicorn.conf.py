@@ -1,7 +1,41 @@
-bind = "0.0.0.0:8000"
+import os
+from pathlib import Path
+
+# Only Nginx talks to Gunicorn; /metrics relies on not being reachable directly.
+bind = "127.0.0.1:8000"
 workers = 3
 threads = 2
 timeout = 60
 wsgi_app = "config.wsgi:application"
 accesslog = None
 errorlog = None
+
+if os.environ.get("GUNICORN_ASGI", "").lower() in {"1", "true", "yes", "on"}:
+    # Each worker runs an event loop: async views wait without holding a
+    # thread, and sync views get a thread per request instead of the fixed
+    # workers x threads pool.
+    worker_class = "uvicorn_worker.UvicornWorker"
+    wsgi_app = "config.asgi:application"
+
+
+def on_starting(server):
+    # Worker metrics are shared through PROMETHEUS_MULTIPROC_DIR. Files of
+    # processes that are gone are removed; the outbox worker's are kept.
+    metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not metrics_dir:
+        return
+    Path(metrics_dir).mkdir(parents=True, exist_ok=True)
+    for path in Path(metrics_dir).glob("*.db"):
+        try:
+            os.kill(int(path.stem.rsplit("_", 1)[-1]), 0)
+        except ProcessLookupError:
+            path.unlink(missing_ok=True)
+        except (PermissionError, ValueError):
+            pass
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,90 @@
+import math
+
+from django.core.cache import cache
+from django.db.models import Max, Min, Prefetch, Q
+from django.utils import timezone
+
+from core.versioning import bump_version, get_version
+from services.models import Promotion, Service, ServiceImage
+
+CATALOG_VERSION_KEY = "catalog:version"
+CATALOG_CHANGED_AT_KEY = "catalog:changed-at"
+
+
+class CatalogSnapshot:
+    def __init__(self, services):
+        self.services = services
+
+    @property
+    def featured(self):
+        return [service for service in self.services if service.featured]
+
+    @property
+    def by_popularity(self):
+        return sorted(self.services, key=lambda service: (-service.booking_count, service.name))
+
+    @property
+    def gallery(self):
+        return sorted(self.services, key=lambda service: (not service.featured, -service.booking_count, service.name))
+
+    @property
+    def grouped(self):
+        grouped = {}
+        for service in self.services:
+            grouped.setdefault(service.category, {}).setdefault(service.subcategory, []).append(service)
+        return grouped
+
+
+def build_catalog_snapshot(at=None):
+    # Three queries regardless of menu size: services, their images and the
+    # promotions that have not ended yet. Service.primary_image,
+    # active_promotion and current_price read from these prefetches.
+    at = at or timezone.now()
+    services = (
+        Service.objects.filter(is_active=True)
+        .order_by("category", "subcategory", "name")
+        .prefetch_related(
+            Prefetch("images", queryset=ServiceImage.objects.order_by("pk")),
+            Prefetch("promotions", queryset=Promotion.objects.filter(is_active=True, end_at__gte=at).order_by("pk")),
+        )
+    )
+    return CatalogSnapshot(list(services))
+
+
+def get_catalog_version():
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    bump_version(CATALOG_VERSION_KEY, lambda: cache.set(CATALOG_CHANGED_AT_KEY, timezone.now(), None))
+
+
+def get_catalog_state(at=None):
+    # (last_modified, next_price_change) for the current catalog version,
+    # recomputed once the next promotion boundary has passed.
+    at = at or timezone.now()
+    key = f"catalog:state:{get_catalog_version()}"
+    state = cache.get(key)
+    if state is None or (state[1] and state[1] <= at):
+        boundaries = Promotion.objects.filter(is_active=True).aggregate(
+            last_start=Max("start_at", filter=Q(start_at__lte=at)),
+            last_end=Max("end_at", filter=Q(end_at__lt=at)),
+            next_start=Min("start_at", filter=Q(start_at__gt=at)),
+            next_end=Min("end_at", filter=Q(end_at__gte=at)),
+        )
+        changes = [
+            Service.objects.aggregate(last_updated=Max("updated_at"))["last_updated"],
+            cache.get(CATALOG_CHANGED_AT_KEY),
+            boundaries["last_start"],
+            boundaries["last_end"],
+        ]
+        state = (
+            max((change for change in changes if change), default=None),
+            min((boundary for boundary in (boundaries["next_start"], boundaries["next_end"]) if boundary), default=None),
+        )
+        cache.set(key, state, None if state[1] is None else max(math.ceil((state[1] - at).total_seconds()), 1))
+    return state
+
+
+def get_next_price_change(at=None):
+    return get_catalog_state(at)[1]
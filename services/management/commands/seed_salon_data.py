@@ -1,20 +1,44 @@
 import json
+import random
+import time as timer
+from collections import Counter
 from datetime import timedelta
 from datetime import time
 from pathlib import Path
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.utils import timezone
 
+from bookings.availability import bump_availability_version, bump_bookings_version
 from bookings.models import Booking, BookingItem
-from core.models import EmailTemplate, SiteSettings, WorkingHour
-from services.models import Service, ServiceImage
+from bookings.occupancy import load_slot_counts, rebuild_slot_occupancy
+from bookings.references import to_base36
+from bookings.stats import rebuild_daily_stats
+from bookings.synthetic import build_synthetic_services, insert_synthetic_bookings, iter_synthetic_bookings
+from core.models import EmailTemplate, SiteSettings
+from core.settings_cache import get_settings_snapshot
+from services.catalog import bump_catalog_version
+from services.models import Service
+from services.pricing import resolve_prices
+from services.sync import format_sync_counts, sync_catalog, sync_working_hours
+
+SYNTHETIC_CHUNK_SIZE = 2000
 
 
 class Command(BaseCommand):
     help = "Seed salon services and core settings"
 
+    def add_arguments(self, parser):
+        parser.add_argument("--bookings", type=int, default=0, help="Generate this many synthetic bookings with items")
+        parser.add_argument("--days", type=int, default=365, help="Spread synthetic bookings over this many days, the last quarter in the future")
+        parser.add_argument("--services", type=int, default=0, help="Generate this many synthetic services on top of the catalog")
+        parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible synthetic data")
+
     def handle(self, *args, **options):
+        if options["bookings"] < 0 or options["services"] < 0 or options["days"] < 1:
+            raise CommandError("--bookings and --services must not be negative and --days must be at least 1.")
+
         base_dir = Path(__file__).resolve().parents[3]
         data = json.loads((base_dir / "data" / "services_seed.json").read_text(encoding="utf-8"))
 
@@ -36,14 +60,15 @@ class Command(BaseCommand):
         )
         self.stdout.write(self.style.SUCCESS(f"Site settings ready: {site_settings.site_name}"))
 
+        hours = {}
         for weekday in range(7):
             if weekday == 6:
-                defaults = {"is_open": False, "open_time": time(0, 0), "close_time": time(0, 0)}
+                hours[weekday] = {"is_open": False, "open_time": time(0, 0), "close_time": time(0, 0)}
             elif weekday == 5:
-                defaults = {"is_open": True, "open_time": time(10, 0), "close_time": time(19, 0)}
+                hours[weekday] = {"is_open": True, "open_time": time(10, 0), "close_time": time(19, 0)}
             else:
-                defaults = {"is_open": True, "open_time": time(9, 0), "close_time": time(16, 0)}
-            WorkingHour.objects.update_or_create(weekday=weekday, defaults=defaults)
+                hours[weekday] = {"is_open": True, "open_time": time(9, 0), "close_time": time(16, 0)}
+        self.stdout.write(format_sync_counts("Working hours", sync_working_hours(hours)))
 
         EmailTemplate.objects.get_or_create(
             template_type=EmailTemplate.TemplateType.ADMIN_BOOKING,
@@ -106,26 +131,17 @@ class Command(BaseCommand):
             },
         )
 
-        for item in data:
-            service, created = Service.objects.update_or_create(
-                name=item["name"],
-                category=item["category"],
-                subcategory=item.get("subcategory", "-"),
-                defaults={
-                    "price": item["price"],
-                    "duration_minutes": item["duration_minutes"],
-                    "is_active": item.get("is_active", True),
-                    "booking_count": item.get("bookings", 0),
-                    "featured": item.get("bookings", 0) >= 15,
-                },
-            )
-            if item.get("images"):
-                ServiceImage.objects.get_or_create(service=service, alt_text=service.name, defaults={"is_primary": True})
-            if created:
-                self.stdout.write(f"Created service: {service.name}")
+        with transaction.atomic():
+            counts = sync_catalog(data)
+        self.stdout.write(format_sync_counts("Services", counts["services"]))
+        self.stdout.write(format_sync_counts("Service images", counts["images"]))
+
+        if options["bookings"] or options["services"]:
+            self.seed_synthetic_data(options)
 
         first_service = Service.objects.filter(is_active=True).order_by("-booking_count", "name").first()
         if first_service and not Booking.objects.exists():
+            price = resolve_prices([first_service])[first_service.pk]
             starts_at = timezone.now() + timedelta(days=1)
             booking = Booking.objects.create(
                 customer_name="Demo Guest",
@@ -133,7 +149,7 @@ class Command(BaseCommand):
                 email="guest@example.com",
                 starts_at=starts_at,
                 total_duration_minutes=first_service.duration_minutes,
-                total_price=first_service.current_price,
+                total_price=price,
             )
             BookingItem.objects.create(
                 booking=booking,
@@ -142,9 +158,78 @@ class Command(BaseCommand):
                 subcategory=first_service.subcategory,
                 service_name=first_service.name,
                 duration_minutes=first_service.duration_minutes,
-                price=first_service.current_price,
+                price=price,
             )
             booking.recalculate()
             booking.save()
 
         self.stdout.write(self.style.SUCCESS("Salon data seeded successfully."))
+
+    def seed_synthetic_data(self, options):
+        # Everything is written with chunked bulk_create in one transaction;
+        # the save signals do not fire, so the slot counters, daily stats and
+        # caches are rebuilt for the generated range afterwards.
+        started = timer.perf_counter()
+        rng = random.Random(options["seed"])
+        snapshot = get_settings_snapshot()
+        slot_minutes = snapshot.effective_settings.booking_slot_minutes
+        tz = snapshot.timezone
+        days = options["days"]
+        start_date = timezone.now().astimezone(tz).date() - timedelta(days=days * 3 // 4)
+        end_date = start_date + timedelta(days=days - 1)
+
+        with transaction.atomic():
+            if options["services"]:
+                first_index = Service.objects.filter(slug__startswith="synthetic-").count()
+                Service.objects.bulk_create(
+                    build_synthetic_services(options["services"], rng, first_index=first_index),
+                    batch_size=SYNTHETIC_CHUNK_SIZE,
+                )
+                self.stdout.write(f"Created {options['services']} synthetic services.")
+
+            inserted = 0
+            if options["bookings"]:
+                services = list(Service.objects.filter(is_active=True))
+                if not services:
+                    raise CommandError("There are no active services to book.")
+                slot_counts = Counter({(day, index): count for day, index, count in load_slot_counts(start_date, end_date)})
+                booked_services = Counter()
+                pairs = iter_synthetic_bookings(
+                    options["bookings"],
+                    services,
+                    start_date,
+                    days,
+                    tz,
+                    rng,
+                    slot_minutes=slot_minutes,
+                    reference_prefix=f"LKS{to_base36(timer.time_ns() // 1_000_000, 8)}",
+                    open_hours=snapshot.open_hours,
+                    capacity=snapshot.effective_settings.concurrent_capacity,
+                    slot_counts=slot_counts,
+                )
+                inserted = insert_synthetic_bookings(
+                    self.count_booked_services(pairs, booked_services),
+                    chunk_size=SYNTHETIC_CHUNK_SIZE,
+                )
+                for service in services:
+                    service.booking_count += booked_services[service.pk]
+                Service.objects.bulk_update(services, ["booking_count"], batch_size=SYNTHETIC_CHUNK_SIZE)
+                rebuild_slot_occupancy(slot_minutes, tz, start_date=start_date, end_date=end_date)
+                rebuild_daily_stats(tz, start_date=start_date, end_date=end_date)
+
+        bump_availability_version()
+        bump_bookings_version()
+        bump_catalog_version()
+        if options["bookings"]:
+            skipped = options["bookings"] - inserted
+            self.stdout.write(
+                f"Created {inserted} synthetic bookings from {start_date} to {end_date}"
+                + (f" ({skipped} skipped because their slots were full)" if skipped else "")
+                + f" in {timer.perf_counter() - started:.1f}s."
+            )
+
+    def count_booked_services(self, pairs, booked_services):
+        for booking, booked in pairs:
+            if booking.status != Booking.Status.CANCELLED:
+                booked_services.update(service.pk for service in booked)
+            yield booking, booked
@@ -0,0 +1,28 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from services.sync import format_sync_counts, sync_catalog
+
+
+class Command(BaseCommand):
+    help = "Create or update services from a catalog JSON file in the services_seed.json format"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            nargs="?",
+            default=str(Path(__file__).resolve().parents[3] / "data" / "services_seed.json"),
+        )
+
+    def handle(self, *args, **options):
+        try:
+            items = json.loads(Path(options["path"]).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as error:
+            raise CommandError(f"Could not read catalog {options['path']}: {error}") from error
+        with transaction.atomic():
+            counts = sync_catalog(items)
+        self.stdout.write(format_sync_counts("Services", counts["services"]))
+        self.stdout.write(format_sync_counts("Service images", counts["images"]))
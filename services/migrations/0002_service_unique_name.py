@@ -0,0 +1,37 @@
+# Generated by Django 5.2.12 on 2026-10-18 15:28
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_services(apps, schema_editor):
+    # Duplicates carry their own bookings, images and promotions, so they are
+    # reported for an admin to rename instead of being merged silently.
+    Service = apps.get_model("services", "Service")
+    duplicates = (
+        Service.objects.values("name", "category", "subcategory")
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)
+        .order_by("category", "subcategory", "name")
+    )
+    if duplicates:
+        names = "; ".join(f"{row['name']} ({row['category']} / {row['subcategory']}) x{row['count']}" for row in duplicates)
+        raise RuntimeError(
+            "Services must be unique by name, category and subcategory before this migration can run. "
+            f"Rename or delete the duplicates in the admin first: {names}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_services, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='service',
+            constraint=models.UniqueConstraint(fields=('name', 'category', 'subcategory'), name='services_service_unique_name'),
+        ),
+    ]
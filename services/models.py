@@ -1,11 +1,18 @@
 from decimal import Decimal
 
 from django.db import models
+from django.db.models import F
 from django.utils import timezone
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 
 
+def get_promotion_sort_key(promotion):
+    # Mirrors the query ordering: promotions without a fixed price first,
+    # then the lowest promotional price, then the oldest promotion.
+    return (promotion.promotional_price is not None, promotion.promotional_price or 0, promotion.pk)
+
+
 class Service(models.Model):
     name = models.CharField(max_length=200)
     slug = models.SlugField(max_length=220, unique=True, blank=True)
@@ -22,6 +29,9 @@ class Service(models.Model):
 
     class Meta:
         ordering = ["category", "subcategory", "name"]
+        constraints = [
+            models.UniqueConstraint(fields=["name", "category", "subcategory"], name="services_service_unique_name"),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -37,7 +47,18 @@ class Service(models.Model):
     @property
     def active_promotion(self):
         now = timezone.now()
-        return self.promotions.filter(is_active=True, start_at__lte=now, end_at__gte=now).order_by("promotional_price").first()
+        if "promotions" in getattr(self, "_prefetched_objects_cache", {}):
+            active = [
+                promotion
+                for promotion in self.promotions.all()
+                if promotion.is_active and promotion.start_at <= now <= promotion.end_at
+            ]
+            return min(active, key=get_promotion_sort_key, default=None)
+        return (
+            self.promotions.filter(is_active=True, start_at__lte=now, end_at__gte=now)
+            .order_by(F("promotional_price").asc(nulls_first=True), "pk")
+            .first()
+        )
 
     @property
     def current_price(self):
@@ -46,6 +67,9 @@ class Service(models.Model):
 
     @property
     def primary_image(self):
+        if "images" in getattr(self, "_prefetched_objects_cache", {}):
+            images = self.images.all()
+            return next((image for image in images if image.is_primary), None) or next(iter(images), None)
         return self.images.filter(is_primary=True).first() or self.images.first()
 
     @property
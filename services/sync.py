@@ -0,0 +1,137 @@
+from decimal import Decimal
+
+from django.utils.text import slugify
+
+from bookings.availability import bump_availability_version
+from core.models import WorkingHour
+from core.settings_cache import bump_settings_version
+from services.catalog import bump_catalog_version
+from services.models import Service, ServiceImage
+
+SERVICE_KEY_FIELDS = ["name", "category", "subcategory"]
+SERVICE_SYNC_FIELDS = ["price", "duration_minutes", "is_active", "booking_count", "featured"]
+WORKING_HOUR_SYNC_FIELDS = ["is_open", "open_time", "close_time"]
+SYNC_BATCH_SIZE = 500
+
+
+def get_service_key(name, category, subcategory):
+    # Matches the unique constraint exactly: a blank subcategory is not "-".
+    return (name, category, subcategory)
+
+
+def build_service_fields(item):
+    bookings = item.get("bookings", 0)
+    return {
+        "price": Decimal(str(item["price"])).quantize(Decimal("0.01")),
+        "duration_minutes": item["duration_minutes"],
+        "is_active": item.get("is_active", True),
+        "booking_count": bookings,
+        "featured": bookings >= 15,
+    }
+
+
+def get_unique_slug(name, taken):
+    # Same scheme as Service.save, checked against the slugs already loaded.
+    base_slug = slugify(name)
+    slug = base_slug
+    counter = 2
+    while slug in taken:
+        slug = f"{base_slug}-{counter}"
+        counter += 1
+    taken.add(slug)
+    return slug
+
+
+def sync_services(items):
+    # Rows are compared in memory and only new or changed ones are written,
+    # in one upsert keyed on (name, category, subcategory).
+    services = {get_service_key(service.name, service.category, service.subcategory): service for service in Service.objects.all()}
+    taken = {service.slug for service in services.values()}
+    counts = {"created": 0, "updated": 0, "unchanged": 0}
+    changed = {}
+    for item in items:
+        key = get_service_key(item["name"], item["category"], item.get("subcategory", "-"))
+        fields = build_service_fields(item)
+        service = services.get(key)
+        if service is None:
+            service = Service(name=key[0], category=key[1], subcategory=key[2], slug=get_unique_slug(key[0], taken), **fields)
+            services[key] = service
+            counts["created"] += 1
+        elif any(getattr(service, field) != value for field, value in fields.items()):
+            for field, value in fields.items():
+                setattr(service, field, value)
+            if key not in changed:
+                counts["updated"] += 1
+        else:
+            if key not in changed:
+                counts["unchanged"] += 1
+            continue
+        changed[key] = service
+    if changed:
+        Service.objects.bulk_create(
+            changed.values(),
+            update_conflicts=True,
+            unique_fields=SERVICE_KEY_FIELDS,
+            update_fields=[*SERVICE_SYNC_FIELDS, "updated_at"],
+            batch_size=SYNC_BATCH_SIZE,
+        )
+        if any(service.pk is None for service in changed.values()):
+            services = {
+                get_service_key(service.name, service.category, service.subcategory): service for service in Service.objects.all()
+            }
+        bump_catalog_version()
+    return counts, services
+
+
+def sync_primary_images(services):
+    # Makes sure each service has the image row the seed data asks for;
+    # existing images are never changed.
+    existing = set(ServiceImage.objects.filter(service__in=services).values_list("service_id", "alt_text"))
+    missing = [
+        ServiceImage(service=service, alt_text=service.name, is_primary=True)
+        for service in services
+        if (service.pk, service.name) not in existing
+    ]
+    if missing:
+        ServiceImage.objects.bulk_create(missing, batch_size=SYNC_BATCH_SIZE)
+        bump_catalog_version()
+    return {"created": len(missing), "updated": 0, "unchanged": len(services) - len(missing)}
+
+
+def sync_working_hours(hours):
+    # hours maps weekday -> {"is_open", "open_time", "close_time"}.
+    existing = {working_hour.weekday: working_hour for working_hour in WorkingHour.objects.all()}
+    counts = {"created": 0, "updated": 0, "unchanged": 0}
+    changed = []
+    for weekday, fields in hours.items():
+        working_hour = existing.get(weekday)
+        if working_hour is None:
+            counts["created"] += 1
+        elif any(getattr(working_hour, field) != fields[field] for field in WORKING_HOUR_SYNC_FIELDS):
+            counts["updated"] += 1
+        else:
+            counts["unchanged"] += 1
+            continue
+        changed.append(WorkingHour(weekday=weekday, **{field: fields[field] for field in WORKING_HOUR_SYNC_FIELDS}))
+    if changed:
+        WorkingHour.objects.bulk_create(
+            changed,
+            update_conflicts=True,
+            unique_fields=["weekday"],
+            update_fields=WORKING_HOUR_SYNC_FIELDS,
+        )
+        bump_settings_version()
+        bump_availability_version()
+    return counts
+
+
+def sync_catalog(items):
+    service_counts, services = sync_services(items)
+    with_images = [
+        services[get_service_key(item["name"], item["category"], item.get("subcategory", "-"))] for item in items if item.get("images")
+    ]
+    return {"services": service_counts, "images": sync_primary_images(with_images)}
+
+
+def format_sync_counts(label, counts):
+    return f"{label}: {counts['created']} created, {counts['updated']} updated, {counts['unchanged']} unchanged"
@@ -1,3 +1,248 @@
+from datetime import time, timedelta
+from decimal import Decimal
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Max
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from bookings.availability import AVAILABILITY_VERSION_KEY
+from bookings.models import Booking, BookingDailyStats, SlotOccupancy
+from core.models import SiteSettings, WorkingHour
+from core.settings_cache import get_settings_version
+from services.catalog import build_catalog_snapshot, get_catalog_version
+from services.models import Promotion, Service, ServiceImage
+from services.pricing import resolve_prices
+from services.sync import sync_catalog, sync_working_hours
+
+
+class CatalogSnapshotTests(TestCase):
+    def setUp(self):
+        SiteSettings.objects.create(site_name="LK")
+
+    def create_services(self, count):
+        now = timezone.now()
+        for index in range(count):
+            service = Service.objects.create(
+                name=f"Service {Service.objects.count()}",
+                category="Nägel",
+                price=Decimal("40.00"),
+                duration_minutes=30,
+                featured=index % 2 == 0,
+            )
+            ServiceImage.objects.create(service=service, alt_text="Secondary")
+            ServiceImage.objects.create(service=service, alt_text="Primary", is_primary=True)
+            Promotion.objects.create(
+                service=service,
+                title="Spring",
+                start_at=now - timedelta(days=1),
+                end_at=now + timedelta(days=1),
+                discount_percent=Decimal("10.00"),
+            )
+
+    def count_page_queries(self, url_name):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    @mock.patch("core.page_cache.is_page_cacheable", return_value=False)
+    def test_catalog_pages_use_a_constant_number_of_queries(self, is_page_cacheable):
+        self.create_services(2)
+        self.client.get(reverse("home"))
+        baseline = {url_name: self.count_page_queries(url_name) for url_name in ("home", "service_list", "gallery", "booking_create")}
+        self.create_services(6)
+        for url_name, query_count in baseline.items():
+            self.assertEqual(self.count_page_queries(url_name), query_count, url_name)
+
+    def test_snapshot_matches_per_service_lookups(self):
+        self.create_services(1)
+        service = Service.objects.get()
+        now = timezone.now()
+        Promotion.objects.create(
+            service=service,
+            title="Fixed",
+            start_at=now - timedelta(days=1),
+            end_at=now + timedelta(days=1),
+            promotional_price=Decimal("30.00"),
+        )
+        Promotion.objects.create(
+            service=service,
+            title="Expired",
+            start_at=now - timedelta(days=3),
+            end_at=now - timedelta(days=2),
+            promotional_price=Decimal("5.00"),
+        )
+        with self.assertNumQueries(3):
+            [snapshot_service] = build_catalog_snapshot().services
+        with self.assertNumQueries(0):
+            snapshot_values = (snapshot_service.primary_image, snapshot_service.active_promotion, snapshot_service.current_price)
+        self.assertEqual(snapshot_values, (service.primary_image, service.active_promotion, service.current_price))
+        self.assertEqual(snapshot_values[0].alt_text, "Primary")
+
+    def test_catalog_version_is_bumped_again_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_services(1)
+            version = get_catalog_version()
+        self.assertNotEqual(get_catalog_version(), version)
+
+
+class PricingTests(TestCase):
+    def test_resolve_prices_matches_current_price_in_one_query(self):
+        now = timezone.now()
+        plain = Service.objects.create(name="Plain", category="Nägel", price=Decimal("20.00"), duration_minutes=30)
+        discounted = Service.objects.create(name="Discounted", category="Nägel", price=Decimal("50.00"), duration_minutes=30)
+        fixed = Service.objects.create(name="Fixed", category="Wimpern", price=Decimal("80.00"), duration_minutes=60)
+        running = {"start_at": now - timedelta(days=1), "end_at": now + timedelta(days=1)}
+        Promotion.objects.create(service=discounted, title="Ten off", discount_percent=Decimal("10.00"), **running)
+        Promotion.objects.create(service=fixed, title="Sixty", promotional_price=Decimal("60.00"), **running)
+        Promotion.objects.create(service=fixed, title="Seventy", promotional_price=Decimal("70.00"), **running)
+        Promotion.objects.create(service=fixed, title="Paused", promotional_price=Decimal("10.00"), is_active=False, **running)
+        services = list(Service.objects.all())
+
+        with self.assertNumQueries(1):
+            prices = resolve_prices(services)
+
+        self.assertEqual(prices, {service.pk: service.current_price for service in services})
+        self.assertEqual(prices[discounted.pk], Decimal("45.00"))
+        self.assertEqual(prices[fixed.pk], Decimal("60.00"))
+        self.assertEqual(prices[plain.pk], Decimal("20.00"))
+
+
+class SeedSalonDataTests(TestCase):
+    def test_synthetic_bookings_respect_capacity_and_opening_hours(self):
+        call_command("seed_salon_data", bookings=300, days=8, services=5, seed=3, stdout=mock.Mock())
+        site_settings = SiteSettings.objects.get()
+        self.assertEqual(Service.objects.filter(slug__startswith="synthetic-").count(), 5)
+        synthetic = Booking.objects.filter(reference__startswith="LKS")
+        self.assertTrue(0 < synthetic.count() <= 300)
+        self.assertFalse(synthetic.filter(items__isnull=True).exists())
+        self.assertLessEqual(SlotOccupancy.objects.aggregate(Max("count"))["count__max"], site_settings.concurrent_capacity)
+        tz = ZoneInfo(site_settings.timezone)
+        open_hours = {working_hour.weekday: working_hour for working_hour in WorkingHour.objects.filter(is_open=True)}
+        for booking in synthetic:
+            starts_at = booking.starts_at.astimezone(tz)
+            working_hour = open_hours[starts_at.weekday()]
+            self.assertGreaterEqual(starts_at.time(), working_hour.open_time)
+            self.assertLessEqual(booking.ends_at.astimezone(tz).time(), working_hour.close_time)
+        self.assertEqual(
+            sum(stats.active_count + stats.cancelled_count for stats in BookingDailyStats.objects.all()),
+            Booking.objects.count(),
+        )
+
+        call_command("seed_salon_data", bookings=10, days=8, services=5, seed=3, stdout=mock.Mock())
+        self.assertEqual(Service.objects.filter(slug__startswith="synthetic-").count(), 10)
+        self.assertLessEqual(SlotOccupancy.objects.aggregate(Max("count"))["count__max"], site_settings.concurrent_capacity)
+
+
+class CatalogSyncTests(TestCase):
+    def build_items(self, count):
+        return [
+            {
+                "name": f"Neuset {index}" if index else "Neuset",
+                "category": "Wimpern",
+                "subcategory": "Classic",
+                "price": 40 + index,
+                "duration_minutes": 60,
+                "bookings": index,
+                "images": index % 2 == 0,
+            }
+            for index in range(count)
+        ]
+
+    def test_sync_upserts_services_with_a_few_statements(self):
+        Service.objects.create(name="Neuset", category="Lashes", price=Decimal("10.00"), duration_minutes=30)
+        items = self.build_items(200)
+        with self.assertNumQueries(6):
+            counts = sync_catalog(items)
+        self.assertEqual(counts["services"], {"created": 200, "updated": 0, "unchanged": 0})
+        self.assertEqual(counts["images"], {"created": 100, "updated": 0, "unchanged": 0})
+        self.assertEqual(Service.objects.get(name="Neuset", category="Wimpern").slug, "neuset-2")
+        self.assertEqual(Service.objects.get(name="Neuset 199").price, Decimal("239.00"))
+
+        items[1]["price"] = 99
+        items[3]["bookings"] = 20
+        with self.assertNumQueries(3):
+            counts = sync_catalog(items)
+        self.assertEqual(counts["services"], {"created": 0, "updated": 2, "unchanged": 198})
+        self.assertEqual(counts["images"], {"created": 0, "updated": 0, "unchanged": 100})
+        self.assertEqual(Service.objects.get(name="Neuset 1").price, Decimal("99.00"))
+        self.assertTrue(Service.objects.get(name="Neuset 3").featured)
+        self.assertEqual(ServiceImage.objects.count(), 100)
+
+    def test_blank_subcategory_is_not_merged_with_dash(self):
+        Service.objects.create(name="Neuset", category="Wimpern", subcategory="", price=Decimal("10.00"), duration_minutes=30)
+        item = {"name": "Neuset", "category": "Wimpern", "subcategory": "-", "price": 40, "duration_minutes": 60}
+        counts = sync_catalog([item])
+        self.assertEqual(counts["services"], {"created": 1, "updated": 0, "unchanged": 0})
+        self.assertEqual(Service.objects.get(subcategory="").price, Decimal("10.00"))
+
+    def test_caches_are_invalidated_again_when_the_sync_commits(self):
+        hours = {0: {"is_open": True, "open_time": time(9, 0), "close_time": time(18, 0)}}
+        with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+            sync_catalog(self.build_items(2))
+            sync_working_hours(hours)
+            catalog_version = get_catalog_version()
+            settings_version = get_settings_version()
+            availability_version = cache.get(AVAILABILITY_VERSION_KEY)
+        self.assertNotEqual(get_catalog_version(), catalog_version)
+        self.assertNotEqual(get_settings_version(), settings_version)
+        self.assertNotEqual(cache.get(AVAILABILITY_VERSION_KEY), availability_version)
+
+    def test_working_hours_are_upserted_by_weekday(self):
+        WorkingHour.objects.create(weekday=0, is_open=True, open_time=time(9, 0), close_time=time(16, 0))
+        hours = {
+            weekday: {"is_open": weekday < 6, "open_time": time(9, 0), "close_time": time(18, 0)} for weekday in range(7)
+        }
+        self.assertEqual(sync_working_hours(hours), {"created": 6, "updated": 1, "unchanged": 0})
+        self.assertEqual(WorkingHour.objects.get(weekday=0).close_time, time(18, 0))
+        self.assertEqual(sync_working_hours(hours), {"created": 0, "updated": 0, "unchanged": 7})
+
+
+class ServiceCatalogApiTests(TestCase):
+    async def test_catalog_json_lists_active_services_with_current_prices(self):
+        now = timezone.now()
+        service = await Service.objects.acreate(name="Gel", category="Nails", price=Decimal("40.00"), duration_minutes=60)
+        await Service.objects.acreate(name="Old", category="Nails", price=Decimal("10.00"), duration_minutes=30, is_active=False)
+        await Promotion.objects.acreate(
+            service=service,
+            title="Spring",
+            start_at=now - timedelta(days=1),
+            end_at=now + timedelta(days=1),
+            discount_percent=Decimal("10.00"),
+        )
+        response = await self.async_client.get(reverse("service_catalog"))
+        self.assertEqual(
+            response.json()["services"],
+            [
+                {
+                    "id": service.pk,
+                    "name": "Gel",
+                    "slug": "gel",
+                    "category": "Nails",
+                    "subcategory": "-",
+                    "duration_minutes": 60,
+                    "price": "36.00",
+                    "regular_price": "40.00",
+                }
+            ],
+        )
+
+    def test_catalog_json_is_cached_until_the_catalog_changes(self):
+        service = Service.objects.create(name="Gel", category="Nails", price=Decimal("40.00"), duration_minutes=60)
+        first = self.client.get(reverse("service_catalog"))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse("service_catalog")).content, first.content)
+            not_modified = self.client.get(reverse("service_catalog"), headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(not_modified.status_code, 304)
 
-# Create your tests here.
+        service.price = Decimal("45.00")
+        service.save()
+        changed = self.client.get(reverse("service_catalog"), headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(changed.json()["services"][0]["price"], "45.00")
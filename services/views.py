@@ -1,33 +1,71 @@
-from django.views.generic import ListView
+import json
 
-from services.models import Service
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.views.generic import TemplateView
 
+from core.metrics import record_cache_lookups
+from core.page_cache import PAGE_CACHE_TIMEOUT, CachedPageMixin, build_etag, set_validators
+from services.catalog import build_catalog_snapshot, get_catalog_version, get_next_price_change
 
-class ServiceListView(ListView):
-    model = Service
-    template_name = "services/service_list.html"
-    context_object_name = "services"
 
-    def get_queryset(self):
-        return Service.objects.filter(is_active=True).prefetch_related("images", "promotions")
+class ServiceListView(CachedPageMixin, TemplateView):
+    template_name = "services/service_list.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        grouped = {}
-        for service in context["services"]:
-            grouped.setdefault(service.category, {}).setdefault(service.subcategory, []).append(service)
-        context["grouped_services"] = grouped
+        catalog = build_catalog_snapshot()
+        context["services"] = catalog.services
+        context["grouped_services"] = catalog.grouped
         return context
 
 
-class GalleryView(ListView):
-    model = Service
+class GalleryView(CachedPageMixin, TemplateView):
     template_name = "services/gallery.html"
-    context_object_name = "services"
 
-    def get_queryset(self):
-        return (
-            Service.objects.filter(is_active=True)
-            .prefetch_related("images")
-            .order_by("-featured", "-booking_count", "name")
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["services"] = build_catalog_snapshot().gallery
+        return context
+
+
+def get_catalog_json():
+    # (etag, body) for the current catalog version; the next promotion start
+    # or end is part of the key, so prices change on time without a bump.
+    next_price_change = get_next_price_change()
+    etag = build_etag(get_catalog_version(), next_price_change)
+    key = "catalog:json:" + etag.strip('"')
+    content = cache.get(key)
+    record_cache_lookups("catalog", content is not None, content is None)
+    if content is None:
+        content = json.dumps(
+            {
+                "services": [
+                    {
+                        "id": service.pk,
+                        "name": service.name,
+                        "slug": service.slug,
+                        "category": service.category,
+                        "subcategory": service.subcategory,
+                        "duration_minutes": service.duration_minutes,
+                        "price": f"{service.current_price:.2f}",
+                        "regular_price": f"{service.price:.2f}",
+                    }
+                    for service in build_catalog_snapshot().services
+                ]
+            }
         )
+        cache.set(key, content, PAGE_CACHE_TIMEOUT)
+    return etag, content
+
+
+async def service_catalog_view(request):
+    # One hop to the sync thread for the cached catalog read; the async ORM
+    # would make the same hop once per query.
+    etag, content = await sync_to_async(get_catalog_json)()
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type="application/json")
+    return set_validators(response, etag)